@@ -0,0 +1,263 @@
+"""
+COMS W4701 Artificial Intelligence - Programming Homework 1
+
+Batch solver for n-Puzzle instances.
+
+Reads one instance per line (the tiles in row-major order, separated by
+spaces or commas, 0 for the blank; blank lines and lines starting with # are
+skipped), solves them on a process pool with any of the searches in
+yl3957_hw1, and writes one JSON object per instance and solver as soon as it
+finishes. Each run can be limited to a number of expanded states and a
+number of seconds. A line that is not a valid instance gets an "error"
+object with its line number and the reason, and the batch goes on.
+
+Usage: python batch_solver.py INSTANCES [-o RESULTS] [--solver NAME ...]
+           [--processes N] [--max-nodes N] [--max-seconds S] [--packed]
+
+@author: Yu Liu (yl3957)
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from multiprocessing import Pool
+
+from yl3957_hw1 import (PackedPuzzle, TuplePuzzle, astar, best_first, bfs,
+                        bidirectional_bfs, dfs, ida_star, is_solvable,
+                        manhattan_heuristic, misplaced_heuristic)
+
+
+class BudgetExceeded(RuntimeError):
+    pass
+
+
+class Budget(object):
+    """
+    Limits a search to max_nodes expanded states and max_seconds of wall
+    time. charge() is called once per expanded state and raises
+    BudgetExceeded when either limit is reached; the clock is only read
+    every few hundred states.
+    """
+
+    CLOCK_INTERVAL = 256
+
+    def __init__(self, max_nodes=None, max_seconds=None):
+        self.max_nodes = max_nodes
+        self.deadline = None if max_seconds is None else time.time() + max_seconds
+        self.nodes = 0
+
+    def charge(self):
+        # The state that would exceed the budget is not counted, so a search
+        # stopped by the node budget reports exactly max_nodes.
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            raise BudgetExceeded("node budget")
+        self.nodes = self.nodes + 1
+        if (self.deadline is not None and self.nodes % Budget.CLOCK_INTERVAL == 0
+                and time.time() > self.deadline):
+            raise BudgetExceeded("time budget")
+
+
+class BudgetedPuzzle(object):
+    """
+    Wraps a search problem and charges the budget for every state whose
+    successors are generated, i.e. for every expanded state.
+    """
+
+    def __init__(self, problem, budget):
+        self.problem = problem
+        self.budget = budget
+        self.goal = problem.goal
+
+    def encode(self, state):
+        return self.problem.encode(state)
+
+    def decode(self, state):
+        return self.problem.decode(state)
+
+    def successors(self, state):
+        self.budget.charge()
+        return self.problem.successors(state)
+
+    def successor_moves(self, state):
+        self.budget.charge()
+        return self.problem.successor_moves(state)
+
+    def is_goal(self, state):
+        return self.problem.is_goal(state)
+
+    def heuristic(self, heuristic):
+        return self.problem.heuristic(heuristic)
+
+
+def ida_solver(state, problem, budget):
+    solution, states_expanded, max_fringe, iterations = ida_star(state, budget)
+    return solution, states_expanded, max_fringe
+
+
+# Every solver is called as solver(state, problem, budget) and returns the
+# usual (solution, states_expanded, max_fringe) triple.
+SOLVERS = {
+    "bfs": lambda state, problem, budget: bfs(state, problem),
+    "dfs": lambda state, problem, budget: dfs(state, problem),
+    "bidirectional": lambda state, problem, budget: bidirectional_bfs(state, problem),
+    "greedy-misplaced":
+        lambda state, problem, budget: best_first(state, misplaced_heuristic, problem),
+    "greedy-manhattan":
+        lambda state, problem, budget: best_first(state, manhattan_heuristic, problem),
+    "astar-misplaced": lambda state, problem, budget: astar(state, misplaced_heuristic, problem),
+    "astar-manhattan": lambda state, problem, budget: astar(state, manhattan_heuristic, problem),
+    "ida": ida_solver,
+}
+
+
+def parse_instance(line):
+    """
+    Parses one line of an instance file into a tuple-of-tuples state.
+    Raises ValueError if the line is not a permutation of the tiles of a
+    square board.
+    """
+    try:
+        cells = [int(token) for token in line.replace(",", " ").split()]
+    except ValueError:
+        raise ValueError("Not a list of integers: {}".format(line.strip()))
+    width = int(round(math.sqrt(len(cells))))
+    if width < 2 or width * width != len(cells):
+        raise ValueError("Not a square board: {}".format(line.strip()))
+    if sorted(cells) != list(range(width * width)):
+        raise ValueError("Not the tiles 0 to {}: {}".format(width * width - 1, line.strip()))
+    return tuple(tuple(cells[row * width:(row + 1) * width]) for row in range(width))
+
+
+def read_instances(filename):
+    """
+    Returns a list of (line number, state, reason) for the instance lines of
+    the file. A line that does not parse has the state None and the reason
+    why; otherwise the reason is None.
+    """
+    instances = []
+    with open(filename) as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if line and not line.startswith("#"):
+                try:
+                    instances.append((number, parse_instance(line), None))
+                except ValueError as e:
+                    instances.append((number, None, str(e)))
+    return instances
+
+
+def solve_task(task):
+    """
+    Solves one instance with one solver inside a pool worker and returns the
+    result record.
+    """
+    index, state, solver_name, packed, max_nodes, max_seconds = task
+    width = len(state[0])
+    problem = PackedPuzzle(width) if packed else TuplePuzzle(width)
+    budget = Budget(max_nodes, max_seconds)
+    record = {"instance": index,
+              "state": [num for row in state for num in row],
+              "solver": solver_name}
+    start = time.time()
+    try:
+        if not is_solvable(state):
+            record["status"] = "unsolvable"
+            solution, states_expanded, max_fringe = None, 0, 0
+        else:
+            solution, states_expanded, max_fringe = SOLVERS[solver_name](
+                state, BudgetedPuzzle(problem, budget), budget)
+            record["status"] = "solved" if solution is not None else "failed"
+    except BudgetExceeded as e:
+        record["status"] = "budget"
+        record["reason"] = str(e)
+        solution, states_expanded, max_fringe = None, budget.nodes, None
+    except ValueError as e:
+        record["status"] = "error"
+        record["reason"] = str(e)
+        solution, states_expanded, max_fringe = None, 0, None
+    record["seconds"] = time.time() - start
+    record["states_expanded"] = states_expanded
+    record["max_fringe"] = max_fringe
+    record["length"] = None if solution is None else len(solution)
+    record["solution"] = solution
+    return record
+
+
+def run_batch(instances, solver_names, output, processes=None, max_nodes=None,
+              max_seconds=None, packed=False):
+    """
+    Solves every instance read by read_instances with every named solver on a
+    process pool and writes each result to output as a JSON line as soon as
+    it arrives. An instance line that did not parse gets a single "error"
+    record instead. Returns the list of results.
+    """
+    results = []
+    for index, (number, state, reason) in enumerate(instances):
+        if state is None:
+            record = {"instance": index, "line": number, "state": None, "solver": None,
+                      "status": "error", "reason": reason, "seconds": 0.0,
+                      "states_expanded": 0, "max_fringe": None, "length": None,
+                      "solution": None}
+            output.write(json.dumps(record) + "\n")
+            results.append(record)
+    output.flush()
+    tasks = [(index, state, solver_name, packed, max_nodes, max_seconds)
+             for index, (number, state, reason) in enumerate(instances) if state is not None
+             for solver_name in solver_names]
+    pool = Pool(processes)
+    try:
+        for record in pool.imap_unordered(solve_task, tasks):
+            record["line"] = instances[record["instance"]][0]
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            results.append(record)
+    finally:
+        pool.close()
+        pool.join()
+    return results
+
+
+def print_summary(results, elapsed):
+    """
+    Prints the status counts and the aggregate throughput to stderr.
+    """
+    statuses = {}
+    for record in results:
+        statuses[record["status"]] = statuses.get(record["status"], 0) + 1
+    nodes = sum(record["states_expanded"] for record in results)
+    elapsed = max(elapsed, 1e-9)
+    sys.stderr.write("{} runs in {:.3f}s: {}\n".format(
+        len(results), elapsed, ", ".join("{} {}".format(count, status)
+                                         for status, count in sorted(statuses.items()))))
+    sys.stderr.write("Throughput: {:.2f} instances/s, {:.0f} nodes/s\n".format(
+        len(results) / elapsed, nodes / elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a batch of n-Puzzle instances.")
+    parser.add_argument("instances")
+    parser.add_argument("-o", "--output", help="results file (default: stdout)")
+    parser.add_argument("--solver", action="append", choices=sorted(SOLVERS),
+                        help="solver to run, may be repeated (default: astar-manhattan)")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--max-nodes", type=int, default=None)
+    parser.add_argument("--max-seconds", type=float, default=None)
+    parser.add_argument("--packed", action="store_true", help="use packed integer states")
+    args = parser.parse_args()
+
+    instances = read_instances(args.instances)
+    output = open(args.output, "w") if args.output else sys.stdout
+    start = time.time()
+    try:
+        results = run_batch(instances, args.solver or ["astar-manhattan"], output,
+                            args.processes, args.max_nodes, args.max_seconds, args.packed)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print_summary(results, time.time() - start)
+
+
+if __name__ == "__main__":
+    main()
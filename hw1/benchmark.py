@@ -0,0 +1,214 @@
+"""
+COMS W4701 Artificial Intelligence - Programming Homework 1
+
+Benchmark suite for the n-Puzzle searches in yl3957_hw1.
+
+The run command generates a reproducible set of instances from a seed,
+solves each one with every search, and writes one CSV row per (search,
+instance) with the best and median wall time over several repeats, states
+expanded, maximum fringe size, nodes per second and the peak memory seen by
+tracemalloc. The compare command diffs two such CSV files and flags every
+row that got slower, expanded more states or used more memory than the
+allowed tolerance.
+
+Usage: python benchmark.py run RESULTS.csv [--seed 0] [--width 3]
+           [--depths 8,16,24] [--per-depth 3] [--repeat 3] [--solver NAME ...]
+       python benchmark.py compare OLD.csv NEW.csv [--tolerance 0.1]
+           [--min-seconds 0.001]
+
+@author: Yu Liu (yl3957)
+"""
+
+import argparse
+import csv
+import random
+import sys
+import time
+import tracemalloc
+
+from yl3957_hw1 import (INVERSE_ACTIONS, astar, best_first, bfs, dfs, get_successors,
+                        ida_star, make_goal_state, manhattan_heuristic,
+                        misplaced_heuristic)
+
+SEARCHES = [
+    ("bfs", lambda state: bfs(state)),
+    ("dfs", lambda state: dfs(state)),
+    ("greedy-misplaced", lambda state: best_first(state, misplaced_heuristic)),
+    ("greedy-manhattan", lambda state: best_first(state, manhattan_heuristic)),
+    ("astar-misplaced", lambda state: astar(state, misplaced_heuristic)),
+    ("astar-manhattan", lambda state: astar(state, manhattan_heuristic)),
+]
+
+FIELDS = ["search", "instance", "depth", "state", "length", "states_expanded",
+          "max_fringe", "wall_min", "wall_median", "nodes_per_sec", "peak_kib"]
+
+# Columns compared by the compare command; larger is worse for all of them.
+COMPARED = ["wall_min", "states_expanded", "max_fringe", "peak_kib"]
+
+
+def random_walk(rng, width, moves):
+    """
+    Returns the state reached from the goal by a random walk of the given
+    number of moves that never immediately undoes the previous move.
+    """
+    state = make_goal_state(width, width)
+    previous = None
+    for _ in range(moves):
+        successors = [(action, child) for action, child in get_successors(state)
+                      if previous is None or action != INVERSE_ACTIONS[previous]]
+        previous, state = rng.choice(successors)
+    return state
+
+
+def generate_instances(seed, width, depths, per_depth, max_tries=1000):
+    """
+    Returns a list of (depth, state) pairs, per_depth states for every
+    requested depth, each with an optimal solution of exactly that depth.
+    Candidates are random walks of at least depth moves from the goal,
+    kept only when ida_star confirms their optimal solution length. The
+    same seed always gives the same instances.
+    """
+    rng = random.Random(seed)
+    instances = []
+    for depth in depths:
+        found = 0
+        tries = 0
+        while found < per_depth:
+            tries = tries + 1
+            if tries > max_tries:
+                raise RuntimeError("No instances of depth {} found in {} tries.".format(
+                    depth, max_tries))
+            state = random_walk(rng, width, depth + rng.randint(0, depth))
+            solution = ida_star(state)[0]
+            if len(solution) == depth:
+                instances.append((depth, state))
+                found = found + 1
+    return instances
+
+
+def measure(search, state, repeat):
+    """
+    Runs search on state repeat times and once more under tracemalloc.
+    Returns the search result, the sorted wall times and the peak traced
+    memory in bytes.
+    """
+    if repeat < 1:
+        raise ValueError("repeat must be at least 1")
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = search(state)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    tracemalloc.start()
+    try:
+        search(state)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, times, peak
+
+
+def run_benchmark(instances, searches, repeat, filename):
+    """
+    Benchmarks every search on every instance and writes the rows to a CSV
+    file, printing progress to stderr.
+    """
+    with open(filename, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        for name, search in searches:
+            for index, (depth, state) in enumerate(instances):
+                (solution, states_expanded, max_fringe), times, peak = measure(
+                    search, state, repeat)
+                wall_min = times[0]
+                row = {"search": name,
+                       "instance": index,
+                       "depth": depth,
+                       "state": " ".join(str(num) for row in state for num in row),
+                       "length": "" if solution is None else len(solution),
+                       "states_expanded": states_expanded,
+                       "max_fringe": max_fringe,
+                       "wall_min": "{:.6f}".format(wall_min),
+                       "wall_median": "{:.6f}".format(times[len(times) // 2]),
+                       "nodes_per_sec": "{:.0f}".format(states_expanded / max(wall_min, 1e-9)),
+                       "peak_kib": "{:.1f}".format(peak / 1024.0)}
+                writer.writerow(row)
+                f.flush()
+                sys.stderr.write("{:<18} #{:<3} depth {:<3} {:>9} states {:>9.4f}s\n".format(
+                    name, index, depth, states_expanded, wall_min))
+
+
+def read_rows(filename):
+    with open(filename, newline="") as f:
+        return {(row["search"], row["instance"]): row for row in csv.DictReader(f)}
+
+
+def compare_runs(old_filename, new_filename, tolerance, min_seconds=0.001):
+    """
+    Prints the relative change of every compared column between two runs
+    and returns the list of regressions, i.e. (search, instance, column,
+    old, new) for every value that grew by more than tolerance. Wall times
+    that grew by less than min_seconds are treated as timer noise.
+    """
+    old_rows = read_rows(old_filename)
+    new_rows = read_rows(new_filename)
+    regressions = []
+    for key in sorted(old_rows, key=lambda key: (key[0], int(key[1]))):
+        if key not in new_rows:
+            print("{} #{}: missing from {}".format(key[0], key[1], new_filename))
+            continue
+        if old_rows[key]["state"] != new_rows[key]["state"]:
+            print("{} #{}: different instance, skipped".format(key[0], key[1]))
+            continue
+        changes = []
+        for column in COMPARED:
+            old = float(old_rows[key][column])
+            new = float(new_rows[key][column])
+            change = (new - old) / old if old else 0.0
+            flag = ""
+            if change > tolerance and (column != "wall_min" or new - old > min_seconds):
+                flag = " REGRESSION"
+                regressions.append((key[0], key[1], column, old, new))
+            changes.append("{} {:+.1%}{}".format(column, change, flag))
+        print("{:<18} #{:<3} {}".format(key[0], key[1], ", ".join(changes)))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the n-Puzzle searches.")
+    subparsers = parser.add_subparsers(dest="command")
+    run_parser = subparsers.add_parser("run")
+    run_parser.add_argument("output")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--width", type=int, default=3)
+    run_parser.add_argument("--depths", default="8,16,24")
+    run_parser.add_argument("--per-depth", type=int, default=3)
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--solver", action="append", choices=[name for name, _ in SEARCHES])
+    compare_parser = subparsers.add_parser("compare")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--tolerance", type=float, default=0.1)
+    compare_parser.add_argument("--min-seconds", type=float, default=0.001)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        if args.repeat < 1:
+            run_parser.error("--repeat must be at least 1")
+        depths = [int(depth) for depth in args.depths.split(",")]
+        instances = generate_instances(args.seed, args.width, depths, args.per_depth)
+        searches = [(name, search) for name, search in SEARCHES
+                    if args.solver is None or name in args.solver]
+        run_benchmark(instances, searches, args.repeat, args.output)
+    elif args.command == "compare":
+        regressions = compare_runs(args.old, args.new, args.tolerance, args.min_seconds)
+        print("{} regressions".format(len(regressions)))
+        if regressions:
+            sys.exit(1)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
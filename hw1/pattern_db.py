@@ -0,0 +1,226 @@
+"""
+COMS W4701 Artificial Intelligence - Programming Homework 1
+
+Disjoint additive pattern databases for the n-Puzzle.
+
+The tiles are split into disjoint groups. For each group, a table stores the
+minimum number of moves of that group's tiles needed to bring them home from
+any placement, found by a backward breadth first search from the goal in
+which moves of the other tiles are free. Because no move is counted in two
+tables, the sum of the lookups is an admissible heuristic.
+
+The tables are written to a single file as one byte per entry and read back
+through mmap, so any number of solver processes share one copy in the page
+cache. PatternDatabase objects are heuristics: astar(state, pdb) works.
+
+Usage: python pattern_db.py build FILE [--width 3] [--group-size 4]
+       python pattern_db.py solve FILE
+
+@author: Yu Liu (yl3957)
+"""
+
+import argparse
+import mmap
+import random
+import struct
+import time
+from collections import deque
+
+from yl3957_hw1 import astar, blank_moves, manhattan_heuristic, print_result
+
+MAGIC = b"PDB1"
+UNKNOWN = 255
+
+
+def default_groups(width, group_size=4):
+    """
+    Splits the tiles 1 .. width*width-1 into consecutive groups of at most
+    group_size tiles.
+    """
+    tiles = list(range(1, width * width))
+    return [tuple(tiles[k:k + group_size]) for k in range(0, len(tiles), group_size)]
+
+
+def pattern_index(positions, size):
+    """
+    Returns the table index of a group placement, with the cell of each
+    tile of the group used as one base-size digit.
+    """
+    index = 0
+    for cell in positions:
+        index = index * size + cell
+    return index
+
+
+def build_pattern_table(width, group):
+    """
+    Builds the table for one tile group by a 0-1 breadth first search from
+    the goal over (group placement, blank cell) states. Moving a group tile
+    costs 1, moving any other tile costs 0. Returns a bytearray indexed by
+    pattern_index of the group placement.
+    """
+    size = width * width
+    k = len(group)
+    neighbours = [[cell for _, cell in moves] for moves in blank_moves(width, width)]
+
+    table = bytearray([UNKNOWN]) * (size ** k)
+    distance = bytearray([UNKNOWN]) * (size ** (k + 1))
+    goal = pattern_index(group, size) * size
+    distance[goal] = 0
+    fringe = deque([goal])
+    while fringe:
+        code = fringe.popleft()
+        index, blank = divmod(code, size)
+        d = distance[index * size + blank]
+        positions = []
+        rest = index
+        for _ in range(k):
+            rest, cell = divmod(rest, size)
+            positions.append(cell)
+        positions.reverse()
+        if table[index] == UNKNOWN:
+            table[index] = d
+        for cell in neighbours[blank]:
+            if cell in positions:
+                moved = list(positions)
+                moved[positions.index(cell)] = blank
+                child = pattern_index(moved, size) * size + cell
+                cost = d + 1
+            else:
+                child = index * size + cell
+                cost = d
+            if cost < distance[child]:
+                distance[child] = cost
+                if cost == d:
+                    fringe.appendleft(child)
+                else:
+                    fringe.append(child)
+    return table
+
+
+def build_database(filename, width, groups=None):
+    """
+    Builds one table per group and writes them to filename. The header holds
+    the board width and the tiles of each group; the tables follow in order.
+    Prints the build time and size of every table.
+    """
+    if groups is None:
+        groups = default_groups(width)
+    tables = []
+    for group in groups:
+        start = time.time()
+        table = build_pattern_table(width, group)
+        end = time.time()
+        print("Group {}: {} bytes, built in {:.3f}s".format(group, len(table), end - start))
+        tables.append(table)
+
+    with open(filename, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<BB", width, len(groups)))
+        for group in groups:
+            f.write(struct.pack("<B", len(group)))
+            f.write(bytes(group))
+        for table in tables:
+            f.write(table)
+    print("Wrote {} tables, {} bytes in total, to {}".format(
+        len(tables), sum(len(table) for table in tables), filename))
+
+
+class PatternDatabase(object):
+    """
+    A disjoint additive pattern database heuristic read from a file built by
+    build_database. Calling it on a tuple-of-tuples state returns the sum of
+    the group lookups.
+    """
+
+    def __init__(self, filename):
+        self.file = open(filename, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:4] != MAGIC:
+            raise ValueError("{} is not a pattern database.".format(filename))
+        self.width, count = struct.unpack_from("<BB", self.data, 4)
+        self.size = self.width * self.width
+        offset = 6
+        self.groups = []
+        for _ in range(count):
+            k = self.data[offset]
+            self.groups.append(tuple(self.data[offset + 1:offset + 1 + k]))
+            offset = offset + 1 + k
+        self.offsets = []
+        for group in self.groups:
+            self.offsets.append(offset)
+            offset = offset + self.size ** len(group)
+
+    def __call__(self, state):
+        positions = [0] * self.size
+        cell = 0
+        for row in state:
+            for num in row:
+                positions[num] = cell
+                cell = cell + 1
+        size = self.size
+        data = self.data
+        h = 0
+        for group, offset in zip(self.groups, self.offsets):
+            index = 0
+            for tile in group:
+                index = index * size + positions[tile]
+            h = h + data[offset + index]
+        return h
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+
+def lookup_cost(heuristic, states, repeat=10):
+    """
+    Returns the average time in seconds of one heuristic evaluation.
+    """
+    start = time.time()
+    for _ in range(repeat):
+        for state in states:
+            heuristic(state)
+    return (time.time() - start) / (repeat * len(states))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or try out a pattern database.")
+    parser.add_argument("command", choices=["build", "solve"])
+    parser.add_argument("filename")
+    parser.add_argument("--width", type=int, default=3)
+    parser.add_argument("--group-size", type=int, default=4)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_database(args.filename, args.width, default_groups(args.width, args.group_size))
+        return
+
+    pdb = PatternDatabase(args.filename)
+    test_states = {3: ((7, 2, 4),
+                       (5, 0, 6),
+                       (8, 3, 1)),
+                   4: ((14, 1, 0, 11),
+                       (3, 12, 10, 7),
+                       (9, 5, 15, 2),
+                       (6, 8, 4, 13))}
+    if pdb.width in test_states:
+        test_state = test_states[pdb.width]
+    else:
+        # Imported here because benchmark is only needed for other widths.
+        from benchmark import random_walk
+        test_state = random_walk(random.Random(0), pdb.width, 6 * pdb.width)
+    for name, heuristic in [("Manhattan", manhattan_heuristic), ("Pattern database", pdb)]:
+        print("====A* ({})====".format(name))
+        start = time.time()
+        solution, states_expanded, max_fringe = astar(test_state, heuristic)
+        end = time.time()
+        print_result(solution, states_expanded, max_fringe)
+        print("Total time: {0:.3f}s".format(end - start))
+        print("Lookup cost: {:.2f}us".format(lookup_cost(heuristic, [test_state]) * 1e6))
+        print()
+    pdb.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,8 @@ See Courseworks for detailed instructions.
 """
 
 import time
+from collections import deque
+from heapq import heappop, heappush
 
 
 def state_to_string(state):
@@ -38,13 +40,20 @@ def swap_cells(state, i1, j1, i2, j2):
     return tuple(new_state)
 
 
-def get_successors(state):
+# The offset from the blank to the tile that each action moves into the blank.
+ACTION_OFFSETS = {"Left": (0, 1), "Right": (0, -1), "Up": (1, 0), "Down": (-1, 0)}
+
+
+def get_successors(state, with_moves=False):
     """
     This function returns a list of possible successor states resulting
     from applicable actions.
     The result should be a list containing (Action, state) tuples.
     For example [("Up", ((1, 4, 2),(0, 5, 8),(3, 6, 7))),
                  ("Left",((4, 0, 2),(1, 5, 8),(3, 6, 7)))]
+    With with_moves=True, each entry also reports the tile that moved and
+    the (row, column) cells it moved from and to:
+    (Action, state, tile, source, target).
     """
 
     child_states = []
@@ -74,248 +83,714 @@ def get_successors(state):
     if x - 1 >= 0:
         child_states.append(("Down", swap_cells(state, x, y, x - 1, y)))
 
+    if with_moves:
+        moves = []
+        for action, child in child_states:
+            dx, dy = ACTION_OFFSETS[action]
+            i, j = x + dx, y + dy
+            moves.append((action, child, state[i][j], (i, j), (x, y)))
+        return moves
     return child_states
 
 
+# Goal states, goal coordinate tables and blank move tables, built once per
+# board size.
+GOAL_STATES = {}
+GOAL_COORDINATES = {}
+BLANK_MOVES = {}
+
+
+def make_goal_state(rows, width):
+    """
+    Returns the goal state with the given number of rows and columns: the
+    tiles in order, row by row, with the blank in the top left corner.
+    """
+    goal = GOAL_STATES.get((rows, width))
+    if goal is None:
+        goal = tuple(tuple(range(row * width, (row + 1) * width)) for row in range(rows))
+        GOAL_STATES[(rows, width)] = goal
+    return goal
+
+
+def goal_state(state):
+    """
+    Returns the goal state (the one accepted by goal_test) with the same
+    dimensions as state.
+    """
+    return make_goal_state(len(state), len(state[0]))
+
+
+def goal_coordinates(width):
+    """
+    Returns a list mapping each tile to its (row, column) in the goal state
+    of a board with the given width.
+    """
+    coordinates = GOAL_COORDINATES.get(width)
+    if coordinates is None:
+        coordinates = [divmod(tile, width) for tile in range(width * width)]
+        GOAL_COORDINATES[width] = coordinates
+    return coordinates
+
+
+def blank_moves(rows, width):
+    """
+    Returns, for each cell of a board with the given number of rows and
+    columns (row-major), the list of applicable (Action, cell the blank swaps
+    with) pairs when the blank is in that cell, in get_successors order.
+    """
+    moves = BLANK_MOVES.get((rows, width))
+    if moves is None:
+        moves = []
+        for blank in range(rows * width):
+            x, y = divmod(blank, width)
+            cell_moves = []
+            if y + 1 < width:
+                cell_moves.append(("Left", blank + 1))
+            if y - 1 >= 0:
+                cell_moves.append(("Right", blank - 1))
+            if x + 1 < rows:
+                cell_moves.append(("Up", blank + width))
+            if x - 1 >= 0:
+                cell_moves.append(("Down", blank - width))
+            moves.append(cell_moves)
+        BLANK_MOVES[(rows, width)] = moves
+    return moves
+
+
 def goal_test(state):
     """
     Returns True if the state is a goal state, False otherwise.
     """
+    return state == goal_state(state)
 
-    n = 0
-    for row in state:
-        for num in row:
-            if n != num:
-                return False
-            n = n + 1
-    return True  # Replace this
 
+def is_solvable(state):
+    """
+    Returns True if the goal state can be reached from state.
+    Every move swaps the blank with a neighbouring tile, which flips both the
+    parity of the permutation of the cells and the parity of the blank's
+    distance from its goal cell. The goal has both even, so a state is
+    solvable exactly when the two parities agree.
+    Every search checks this first, so that an unsolvable instance is
+    rejected at once instead of after exhausting half the state space.
+    """
+    cells = [num for row in state for num in row]
+    if sorted(cells) != list(range(len(cells))):
+        raise ValueError("Not a puzzle state: {}".format(state))
+    seen = [False] * len(cells)
+    cycles = 0
+    for k in range(len(cells)):
+        if not seen[k]:
+            cycles = cycles + 1
+            while not seen[k]:
+                seen[k] = True
+                k = cells[k]
+    blank = cells.index(0)
+    width = len(state[0])
+    return (len(cells) - cycles) % 2 == (blank // width + blank % width) % 2
+
+
+def reconstruct_path(parents, final):
+    """
+    Follows the parent links back from final to the start state and returns
+    the list of actions leading from the start to final.
+    """
+    solution = []
+    while final in parents:
+        parent, action = parents[final]
+        solution.append(action)
+        final = parent
+    solution.reverse()
+    return solution
 
-def bfs(state):
+
+def bfs(state, problem=None):
     """
     Breadth first search.
     Returns three values: A list of actions, the number of states expanded, and
     the maximum size of the fringe.
+    The optional problem selects the state representation (tuple or packed).
     You may want to keep track of three mutable data structures:
     - The fringe of nodes to expand (operating as a queue in BFS)
-    - A set of closed nodes already expanded
+    - A set of nodes already seen (expanded or waiting in the fringe), so that
+      each state enters the fringe only once
     - A mapping (dictionary) from a given node to its parent and associated action
     """
     states_expanded = 0
     max_fringe = 0
-    solution = []
-    final = None
-    fringe = []
-    closed = set()
+    fringe = deque()
+    seen = set()
     parents = {}
-    # YOUR CODE HERE
+    if problem is None:
+        problem = TuplePuzzle(len(state[0]))
+    if not is_solvable(state):
+        return None, states_expanded, max_fringe  # No solution exists
+    state = problem.encode(state)
     fringe.append(state)
-    flag = False
-    while len(fringe) > 0:
+    seen.add(state)
+    while fringe:
         max_fringe = max(max_fringe, len(fringe))
-        s = fringe.pop(0)
-        if s in closed:
-            continue
-        closed.add(s)
-        if goal_test(s):
-            final = s
-            flag = True
-            break
-        # if s not in closed:
+        s = fringe.popleft()
+        if problem.is_goal(s):
+            return reconstruct_path(parents, s), states_expanded, max_fringe
         states_expanded = states_expanded + 1
-        for successor in get_successors(s):
-            if successor[1] not in closed:
-                parents[successor[1]] = [s, successor[0]]
-                fringe.append(successor[1])
-        if flag:
-            break
-    if flag:
-        while final in parents:
-            solution.insert(0, parents[final][1])
-            final = parents[final][0]
-        return solution, states_expanded, max_fringe
-    else:
-        return None, states_expanded, max_fringe  # No solution found
+        for action, successor in problem.successors(s):
+            if successor not in seen:
+                seen.add(successor)
+                parents[successor] = (s, action)
+                fringe.append(successor)
+    return None, states_expanded, max_fringe  # No solution found
 
 
-def dfs(state):
+def dfs(state, problem=None):
     """
     Depth first search.
     Returns three values: A list of actions, the number of states expanded, and
     the maximum size of the fringe.
+    The optional problem selects the state representation (tuple or packed).
     You may want to keep track of three mutable data structures:
     - The fringe of nodes to expand (operating as a stack in DFS)
-    - A set of closed nodes already expanded
+    - A set of nodes already seen (expanded or waiting in the fringe), so that
+      each state enters the fringe only once
     - A mapping (dictionary) from a given node to its parent and associated action
     """
     states_expanded = 0
     max_fringe = 0
-    solution = []
-    final = None
     fringe = []
-    closed = set()
+    seen = set()
     parents = {}
-    # YOUR CODE HERE
+    if problem is None:
+        problem = TuplePuzzle(len(state[0]))
+    if not is_solvable(state):
+        return None, states_expanded, max_fringe  # No solution exists
+    state = problem.encode(state)
     fringe.append(state)
-    flag = False
-    while len(fringe) > 0:
+    seen.add(state)
+    while fringe:
         max_fringe = max(max_fringe, len(fringe))
         s = fringe.pop()
-        if s in closed:
-            continue
-        closed.add(s)
-        if goal_test(s):
-            final = s
-            flag = True
-            break
-        # if s not in closed:
+        if problem.is_goal(s):
+            return reconstruct_path(parents, s), states_expanded, max_fringe
         states_expanded = states_expanded + 1
-        for successor in get_successors(s):
-            if successor[1] not in closed:
-                parents[successor[1]] = [s, successor[0]]
-                fringe.append(successor[1])
-        if flag:
-            break
-    if flag:
-        while final in parents:
-            solution.insert(0, parents[final][1])
-            final = parents[final][0]
+        for action, successor in problem.successors(s):
+            if successor not in seen:
+                seen.add(successor)
+                parents[successor] = (s, action)
+                fringe.append(successor)
+    return None, states_expanded, max_fringe  # No solution found
 
-        return solution, states_expanded, max_fringe
-    else:
-        return None, states_expanded, max_fringe  # No solution found
+
+INVERSE_ACTIONS = {"Up": "Down", "Down": "Up", "Left": "Right", "Right": "Left"}
+
+
+def expand_layer(problem, layer, parents, depth, other_depth):
+    """
+    Expands every state of one breadth-first layer. Returns the next layer,
+    the number of states expanded, and the state at which this search meets
+    the opposite one along the shortest combined path (or None).
+    The whole layer is expanded before a meeting point is chosen, since the
+    first collision is not necessarily on a shortest path.
+    """
+    next_layer = []
+    meet = None
+    best = None
+    for s in layer:
+        d = depth[s] + 1
+        for action, successor in problem.successors(s):
+            if successor not in depth:
+                depth[successor] = d
+                parents[successor] = (s, action)
+                next_layer.append(successor)
+                if successor in other_depth:
+                    total = d + other_depth[successor]
+                    if best is None or total < best:
+                        best = total
+                        meet = successor
+    return next_layer, len(layer), meet
+
+
+def bidirectional_bfs(state, problem=None):
+    """
+    Bidirectional breadth first search.
+    Searches forward from state and backward from the goal state, always
+    expanding a full layer of whichever fringe is smaller, until the two
+    searches meet. The backward half of the path is spliced on with each
+    action inverted, since the backward search records moves from the goal.
+    Returns three values: A list of actions, the number of states expanded, and
+    the maximum size of the fringe (both fringes combined).
+    """
+    states_expanded = 0
+    max_fringe = 0
+    if problem is None:
+        problem = TuplePuzzle(len(state[0]))
+    if not is_solvable(state):
+        return None, states_expanded, max_fringe  # No solution exists
+    start = problem.encode(state)
+    goal = problem.goal
+    if problem.is_goal(start):
+        return [], states_expanded, 1
+
+    forward_fringe = [start]
+    forward_parents = {}
+    forward_depth = {start: 0}
+    backward_fringe = [goal]
+    backward_parents = {}
+    backward_depth = {goal: 0}
+    while forward_fringe and backward_fringe:
+        max_fringe = max(max_fringe, len(forward_fringe) + len(backward_fringe))
+        if len(forward_fringe) <= len(backward_fringe):
+            forward_fringe, expanded, meet = expand_layer(
+                problem, forward_fringe, forward_parents, forward_depth, backward_depth)
+        else:
+            backward_fringe, expanded, meet = expand_layer(
+                problem, backward_fringe, backward_parents, backward_depth, forward_depth)
+        states_expanded = states_expanded + expanded
+        if meet is not None:
+            solution = reconstruct_path(forward_parents, meet)
+            while meet in backward_parents:
+                parent, action = backward_parents[meet]
+                solution.append(INVERSE_ACTIONS[action])
+                meet = parent
+            return solution, states_expanded, max_fringe
+    return None, states_expanded, max_fringe  # No solution found
 
 
 def misplaced_heuristic(state):
     """
-    Returns the number of misplaced tiles.
+    Returns the number of misplaced tiles. The blank is not a tile and is not
+    counted.
     """
     count = 0
     n = 0
     for row in state:
         for num in row:
-            if n != num:
+            if n != num and num != 0:
                 count = count + 1
             n = n + 1
     return count
 
 
+def misplaced_delta(h, tile, source, target, width):
+    """
+    Returns the misplaced tile count of a successor state, given the count h
+    of its parent and the tile that moved from cell source to cell target.
+    """
+    goal = goal_coordinates(width)[tile]
+    if source == goal:
+        h = h + 1
+    if target == goal:
+        h = h - 1
+    return h
+
+
 def manhattan_heuristic(state):
     """
     For each misplaced tile, compute the Manhattan distance between the current
     position and the goal position. Then return the sum of all distances.
+    The blank is not a tile and is not counted, which keeps the heuristic
+    admissible.
     """
+    coordinates = goal_coordinates(len(state[0]))
     dis = 0
     x = 0
     for row in state:
         y = 0
         for num in row:
-            dis = dis + abs(num // 3 - x) + abs(num % 3 - y)
+            if num != 0:
+                goal_x, goal_y = coordinates[num]
+                dis = dis + abs(goal_x - x) + abs(goal_y - y)
             y = y + 1
         x = x + 1
     return dis
 
-def best_first(state, heuristic):
+
+def manhattan_delta(h, tile, source, target, width):
+    """
+    Returns the Manhattan distance of a successor state, given the distance h
+    of its parent and the tile that moved from cell source to cell target.
+    """
+    row, column = goal_coordinates(width)[tile]
+    return (h - abs(row - source[0]) - abs(column - source[1])
+            + abs(row - target[0]) + abs(column - target[1]))
+
+
+# A heuristic with a delta function can be evaluated incrementally: the
+# searches pass it the parent's value and the move instead of the new state.
+misplaced_heuristic.delta = misplaced_delta
+manhattan_heuristic.delta = manhattan_delta
+
+
+class PuzzleProblem(object):
+    """
+    The parts of an n-Puzzle search problem that only depend on the board
+    width: the goal coordinates of every tile and a table of the Manhattan
+    distance of every tile from every cell. Subclasses set self.goal to the
+    goal state in their own representation, which makes the goal check a
+    single comparison.
+    """
+
+    def __init__(self, width):
+        self.width = width
+        self.size = width * width
+        self.goal_coordinates = goal_coordinates(width)
+        self.distance = [[0] * self.size]
+        for tile in range(1, self.size):
+            goal_x, goal_y = self.goal_coordinates[tile]
+            self.distance.append([abs(goal_x - x) + abs(goal_y - y)
+                                  for x, y in self.goal_coordinates])
+
+    def is_goal(self, state):
+        return state == self.goal
+
+
+class TuplePuzzle(PuzzleProblem):
+    """
+    The search problem over tuple-of-tuples states, as used by get_successors
+    and goal_test. Searches use this representation unless told otherwise.
+    """
+
+    def __init__(self, width):
+        PuzzleProblem.__init__(self, width)
+        self.goal = make_goal_state(width, width)
+
+    def encode(self, state):
+        return state
+
+    def decode(self, state):
+        return state
+
+    def successors(self, state):
+        return get_successors(state)
+
+    def successor_moves(self, state):
+        return get_successors(state, with_moves=True)
+
+    def heuristic(self, heuristic):
+        return heuristic
+
+
+class PackedPuzzle(PuzzleProblem):
+    """
+    The search problem over packed integer states. The tile in cell k
+    (row-major) occupies bits [8 + b*k, 8 + b*(k+1)) where b is the number of
+    bits per tile (4 for the 8- and 15-puzzle), and the low 8 bits hold the
+    index of the blank cell. Successors are generated by moving one tile
+    field with shifts, so states never have to be unpacked during a search.
+    """
+
+    def __init__(self, width):
+        PuzzleProblem.__init__(self, width)
+        self.bits = max(4, (self.size - 1).bit_length())
+        self.mask = (1 << self.bits) - 1
+        self.shifts = [8 + self.bits * k for k in range(self.size)]
+
+        # For each blank cell, the applicable actions with the cell the blank
+        # swaps with and the shifts of both cells' fields.
+        self.moves = [[(action, target, self.shifts[blank], self.shifts[target])
+                       for action, target in moves]
+                      for blank, moves in enumerate(blank_moves(width, width))]
+        self.cells = self.goal_coordinates
+        self.goal = self.encode(make_goal_state(width, width))
+
+    def encode(self, state):
+        """
+        Packs a tuple-of-tuples state into an integer.
+        """
+        packed = 0
+        k = 0
+        for row in state:
+            for num in row:
+                if num == 0:
+                    packed = packed | k
+                else:
+                    packed = packed | (num << self.shifts[k])
+                k = k + 1
+        return packed
+
+    def decode(self, packed):
+        """
+        Unpacks an integer state back into a tuple-of-tuples state.
+        """
+        cells = [(packed >> shift) & self.mask for shift in self.shifts]
+        width = self.width
+        return tuple(tuple(cells[row * width:(row + 1) * width]) for row in range(width))
+
+    def successors(self, packed):
+        """
+        Same as get_successors, but on packed states: the tile next to the
+        blank is lifted out of its field and added into the blank's field.
+        """
+        blank = packed & 0xFF
+        child_states = []
+        for action, target, blank_shift, target_shift in self.moves[blank]:
+            tile = (packed >> target_shift) & self.mask
+            child = packed + (tile << blank_shift) - (tile << target_shift) + target - blank
+            child_states.append((action, child))
+        return child_states
+
+    def successor_moves(self, packed):
+        """
+        Same as get_successors with with_moves=True, but on packed states.
+        """
+        blank = packed & 0xFF
+        cells = self.cells
+        child_states = []
+        for action, target, blank_shift, target_shift in self.moves[blank]:
+            tile = (packed >> target_shift) & self.mask
+            child = packed + (tile << blank_shift) - (tile << target_shift) + target - blank
+            child_states.append((action, child, tile, cells[target], cells[blank]))
+        return child_states
+
+    def misplaced_heuristic(self, packed):
+        count = 0
+        k = 0
+        for shift in self.shifts:
+            num = (packed >> shift) & self.mask
+            if num != k and num != 0:
+                count = count + 1
+            k = k + 1
+        return count
+
+    def manhattan_heuristic(self, packed):
+        dis = 0
+        distance = self.distance
+        k = 0
+        for shift in self.shifts:
+            dis = dis + distance[(packed >> shift) & self.mask][k]
+            k = k + 1
+        return dis
+
+    def heuristic(self, heuristic):
+        """
+        Returns a version of heuristic that accepts packed states. The
+        heuristics defined in this file have native packed implementations;
+        any other heuristic is evaluated on the decoded state.
+        """
+        if heuristic is misplaced_heuristic:
+            return self.misplaced_heuristic
+        if heuristic is manhattan_heuristic:
+            return self.manhattan_heuristic
+        return lambda packed: heuristic(self.decode(packed))
+
+
+class PriorityQueue(object):
+    """
+    A priority queue of states with decrease-key, built on heapq with lazy
+    deletion. Pushing a state that is already queued replaces its entry: the
+    old heap entry is marked removed and skipped when it reaches the top.
+    Entries are ordered by priority, then by a tie-breaker chosen by the
+    caller, then by insertion order, so states are never compared.
+    """
+
+    REMOVED = object()
+
+    def __init__(self):
+        self.heap = []
+        self.entries = {}
+        self.counter = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, state):
+        return state in self.entries
+
+    def push(self, state, priority, tie=0, data=None):
+        """
+        Adds state, or changes its priority if it is already queued. data is
+        returned alongside the state when it is popped.
+        """
+        old = self.entries.get(state)
+        if old is not None:
+            old[3] = PriorityQueue.REMOVED
+        entry = [priority, tie, self.counter, state, data]
+        self.counter = self.counter + 1
+        self.entries[state] = entry
+        heappush(self.heap, entry)
+
+    def pop(self):
+        """
+        Removes and returns the (state, priority, data) with the lowest
+        priority.
+        """
+        while self.heap:
+            priority, tie, count, state, data = heappop(self.heap)
+            if state is not PriorityQueue.REMOVED:
+                del self.entries[state]
+                return state, priority, data
+        raise KeyError("pop from an empty priority queue")
+
+
+def best_first(state, heuristic, problem=None):
     """
     Best first search.
     Returns three value s: A list of actions, the number of states expanded, and
     the maximum size of the fringe.
+    The optional problem selects the state representation (tuple or packed).
+    If the heuristic has a delta function (see manhattan_delta), successor
+    values are computed from the parent's value instead of from scratch.
+    Ties between equal heuristic values go to the state queued first.
     You may want to keep track of three mutable data structures:
     - The fringe of nodes to expand (operating as a priority queue in greedy search)
     - A set of closed nodes already expanded
     - A mapping (dictionary) from a given node to its parent and associated action
     """
-    # You may want to use these functions to maintain a priority queue
-    from heapq import heappush
-    from heapq import heappop
-
     states_expanded = 0
     max_fringe = 0
-    solution = []
-    final = None
-    fringe = []
+    fringe = PriorityQueue()
     closed = set()
     parents = {}
-    heappush(fringe, (heuristic(state), state))
-    flag = False
-    while len(fringe) > 0:
+    width = len(state[0])
+    if problem is None:
+        problem = TuplePuzzle(width)
+    if not is_solvable(state):
+        return None, states_expanded, max_fringe  # No solution exists
+    delta = getattr(heuristic, "delta", None)
+    state = problem.encode(state)
+    heuristic = problem.heuristic(heuristic)
+    fringe.push(state, heuristic(state))
+    while fringe:
         max_fringe = max(max_fringe, len(fringe))
-        s = heappop(fringe)
-        if s[1] in closed:
-            continue
-        closed.add(s[1])
-        if goal_test(s[1]):
-            final = s[1]
-            flag = True
-            break
+        s, h, data = fringe.pop()
+        closed.add(s)
+        if problem.is_goal(s):
+            return reconstruct_path(parents, s), states_expanded, max_fringe
         states_expanded = states_expanded + 1
-        for successor in get_successors(s[1]):
-            if successor[1] not in closed:
-                parents[successor[1]] = [s[1], successor[0]]
-                heappush(fringe, (heuristic(successor[1]), successor[1]))
-        if flag:
-            break
-    if flag:
-        while final in parents:
-            solution.insert(0, parents[final][1])
-            final = parents[final][0]
-        return solution, states_expanded, max_fringe
-    else:
-        return None, states_expanded, max_fringe  # No solution found
-
-
-def astar(state, heuristic):
+        for action, successor, tile, source, target in problem.successor_moves(s):
+            if successor not in closed and successor not in fringe:
+                parents[successor] = (s, action)
+                if delta is None:
+                    child_h = heuristic(successor)
+                else:
+                    child_h = delta(h, tile, source, target, width)
+                fringe.push(successor, child_h)
+    return None, states_expanded, max_fringe  # No solution found
+
+
+def astar(state, heuristic, problem=None):
     """
     A-star search.
     Returns three values: A list of actions, the number of states expanded, and
     the maximum size of the fringe.
+    The optional problem selects the state representation (tuple or packed).
+    If the heuristic has a delta function (see manhattan_delta), successor
+    values are computed from the parent's value instead of from scratch.
+    Ties between equal f values go to the state with the larger path cost g,
+    i.e. the one closer to a goal. A state's cost and parent are only
+    changed when a strictly cheaper path to it is found, in which case it is
+    re-queued (or reopened, if it was already expanded), so the returned path
+    is optimal for any admissible heuristic.
     You may want to keep track of three mutable data structures:
-    - The fringe of nodes to expand (operating as a priority queue in greedy search)
-    - A set of closed nodes already expanded
+    - The fringe of nodes to expand (a priority queue with decrease-key)
+    - A mapping from each node to the cheapest known path cost to it
     - A mapping (dictionary) from a given node to its parent and associated action
     """
-    from heapq import heappush
-    from heapq import heappop
-
     states_expanded = 0
     max_fringe = 0
-    solution = []
-    final = None
-    fringe = []
-    closed = set()
+    fringe = PriorityQueue()
     parents = {}
     cost = {}
+    width = len(state[0])
+    if problem is None:
+        problem = TuplePuzzle(width)
+    if not is_solvable(state):
+        return None, states_expanded, max_fringe  # No solution exists
+    delta = getattr(heuristic, "delta", None)
+    state = problem.encode(state)
+    heuristic = problem.heuristic(heuristic)
     cost[state] = 0
-    # YOUR CODE HERE
-    heappush(fringe, (heuristic(state) + cost[state], state))
-    flag = False
-    while len(fringe) > 0:
+    h = heuristic(state)
+    fringe.push(state, h, 0, h)
+    while fringe:
         max_fringe = max(max_fringe, len(fringe))
-        s = heappop(fringe)
-        if s[1] in closed:
-            continue
-        closed.add(s[1])
-        if goal_test(s[1]):
-            final = s[1]
-            flag = True
-            break
-        # if s not in closed:
+        s, f, h = fringe.pop()
+        if problem.is_goal(s):
+            return reconstruct_path(parents, s), states_expanded, max_fringe
         states_expanded = states_expanded + 1
-        for successor in get_successors(s[1]):
-            if successor[1] not in closed:
-                parents[successor[1]] = [s[1], successor[0]]
-                c = cost[s[1]]
-                cost[successor[1]] = c + 1
-                heappush(fringe, (heuristic(successor[1]) + cost[successor[1]], successor[1]))
-        if flag:
-            break
-    if flag:
-        while final in parents:
-            solution.insert(0, parents[final][1])
-            final = parents[final][0]
-        return solution, states_expanded, max_fringe
-    else:
-        return None, states_expanded, max_fringe  # No solution found
+        g = cost[s] + 1
+        for action, successor, tile, source, target in problem.successor_moves(s):
+            if successor in cost and cost[successor] <= g:
+                continue
+            cost[successor] = g
+            parents[successor] = (s, action)
+            if delta is None:
+                child_h = heuristic(successor)
+            else:
+                child_h = delta(h, tile, source, target, width)
+            fringe.push(successor, g + child_h, -g, child_h)
+    return None, states_expanded, max_fringe  # No solution found
+
+
+def ida_star(state, budget=None):
+    """
+    Iterative deepening A* search with the Manhattan distance heuristic.
+    Each iteration is a depth first search that cuts off paths whose cost plus
+    heuristic exceeds the current threshold; the next threshold is the
+    smallest value that was cut off. The board is a single mutable list that
+    is changed in place on the way down and restored on the way back, and the
+    heuristic is updated by the distance change of the one tile that moved,
+    so memory use is linear in the solution depth.
+    Returns four values: A list of actions, the number of states expanded, the
+    maximum size of the fringe (the longest path held in memory), and a list
+    of (threshold, states expanded) pairs, one per iteration. The last
+    threshold is the one the solution was found at.
+    An optional budget object has its charge() method called once for every
+    expanded state, and may stop the search by raising an exception.
+    """
+    width = len(state[0])
+    if not is_solvable(state):
+        return None, 0, 0, []  # No solution exists
+    board = [num for row in state for num in row]
+    distance = TuplePuzzle(width).distance
+    moves = blank_moves(len(state), width)
+
+    found = -1
+    solution = []
+    counters = [0, 0]  # states expanded in this iteration, deepest path
+
+    def search(blank, previous, g, h, threshold):
+        f = g + h
+        if f > threshold:
+            return f
+        if h == 0:
+            return found
+        counters[0] = counters[0] + 1
+        if budget is not None:
+            budget.charge()
+        if g + 1 > counters[1]:
+            counters[1] = g + 1
+        minimum = None
+        for action, target in moves[blank]:
+            if target == previous:
+                continue
+            num = board[target]
+            board[blank] = num
+            board[target] = 0
+            solution.append(action)
+            t = search(target, blank, g + 1,
+                       h - distance[num][target] + distance[num][blank], threshold)
+            if t == found:
+                return found
+            solution.pop()
+            board[target] = num
+            board[blank] = 0
+            if minimum is None or t < minimum:
+                minimum = t
+        return minimum
+
+    states_expanded = 0
+    iterations = []
+    h = manhattan_heuristic(state)
+    threshold = h
+    while threshold is not None:
+        counters[0] = 0
+        t = search(board.index(0), None, 0, h, threshold)
+        states_expanded = states_expanded + counters[0]
+        iterations.append((threshold, counters[0]))
+        if t == found:
+            return solution, states_expanded, counters[1], iterations
+        threshold = t
+    return None, states_expanded, counters[1], iterations  # No solution found
 
 
 def print_result(solution, states_expanded, max_fringe):
@@ -331,6 +806,27 @@ def print_result(solution, states_expanded, max_fringe):
     print("Max fringe size: {}.".format(max_fringe))
 
 
+def compare_representations(state):
+    """
+    Runs every search on both the tuple and the packed representation and
+    prints the expansion rate of each, so the two can be compared directly.
+    """
+    packed = PackedPuzzle(len(state))
+    searches = [("BFS", bfs, ()),
+                ("Bidirectional BFS", bidirectional_bfs, ()),
+                ("DFS", dfs, ()),
+                ("Greedy (Misplaced)", best_first, (misplaced_heuristic,)),
+                ("A* (Misplaced)", astar, (misplaced_heuristic,)),
+                ("A* (Manhattan)", astar, (manhattan_heuristic,))]
+    for name, search, args in searches:
+        for label, problem in [("tuple", TuplePuzzle(len(state))), ("packed", packed)]:
+            start = time.time()
+            solution, states_expanded, max_fringe = search(state, *(args + (problem,)))
+            elapsed = max(time.time() - start, 1e-9)
+            print("{:<20} {:<6} {:>8} states {:>8.3f}s {:>12.0f} states/s".format(
+                name, label, states_expanded, elapsed, states_expanded / elapsed))
+
+
 if __name__ == "__main__":
 
     # Easy test case
@@ -385,3 +881,24 @@ if __name__ == "__main__":
     print_result(solution, states_expanded, max_fringe)
     print("Total time: {0:.3f}s".format(end-start))
 
+    print()
+    print("====Bidirectional BFS====")
+    start = time.time()
+    solution, states_expanded, max_fringe = bidirectional_bfs(test_state)
+    end = time.time()
+    print_result(solution, states_expanded, max_fringe)
+    print("Total time: {0:.3f}s".format(end-start))
+
+    print()
+    print("====IDA* (Total Manhattan Distance Heuristic)====")
+    start = time.time()
+    solution, states_expanded, max_fringe, iterations = ida_star(test_state)
+    end = time.time()
+    print_result(solution, states_expanded, max_fringe)
+    for threshold, expanded in iterations:
+        print("Threshold {}: {} states expanded.".format(threshold, expanded))
+    print("Total time: {0:.3f}s".format(end-start))
+
+    print()
+    print("====Tuple vs Packed States====")
+    compare_representations(test_state)
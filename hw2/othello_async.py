@@ -0,0 +1,213 @@
+"""
+COMS W4701 Artificial Intelligence - Programming Homework 2
+
+An asyncio version of the game manager. The AI processes are started with
+asyncio.create_subprocess_exec and every move is read with a deadline from
+asyncio.wait_for, so one event loop in one thread can drive many games at
+once without a Timer thread or a blocking read per pending move. The AIs
+see exactly the same stdin/stdout protocol as with othello_game.
+
+The tournament runner uses this manager with --async; on its own, this
+module plays a single game like othello_game does.
+
+Usage: python othello_async.py AI1.py AI2.py [--dimension 4] [--compact]
+
+@author: Yu Liu (yl3957)
+"""
+
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+
+from othello_game import (AiPlayerInterface, AiTimeoutError, InvalidMoveError,
+                          OthelloGameManager, end_result, final_message, forfeit_message,
+                          start_result)
+from othello_shared import get_score
+
+
+class AsyncAiPlayer(AiPlayerInterface):
+    """
+    An AI process driven from the event loop. Create it with
+    AsyncAiPlayer.start(filename, color) instead of the constructor.
+    """
+
+    def __init__(self, process, name, color, compact=False):
+        self.process = process
+        self.name = name
+        self.color = color
+        self.compact = compact
+        self.synced = False
+        self.move_times = []
+        self.killed = False
+
+    @classmethod
+    async def start(cls, filename, color, compact=False, stderr=None):
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, filename, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=stderr)
+        try:
+            line = await asyncio.wait_for(process.stdout.readline(), AiPlayerInterface.TIMEOUT)
+        except asyncio.TimeoutError:
+            process.kill()
+            raise AiTimeoutError
+        try:
+            process.stdin.write((str(color) + "\n").encode("ASCII"))
+            await process.stdin.drain()
+        except OSError:
+            # As with AiPlayerInterface, the first move forfeits.
+            pass
+        return cls(process, line.decode("ASCII", "replace").strip(), color, compact)
+
+    async def get_move(self, manager):
+        try:
+            self.process.stdin.write(self.turn_message(manager).encode("ASCII"))
+            await self.process.stdin.drain()
+        except OSError:
+            raise self.not_running()
+        start = time.time()
+        try:
+            move_s = await asyncio.wait_for(self.process.stdout.readline(),
+                                            AiPlayerInterface.TIMEOUT)
+        except asyncio.TimeoutError:
+            self.process.kill()
+            raise AiTimeoutError
+        self.move_times.append(time.time() - start)
+        return self.parse_move(move_s, manager.dimension)
+
+    async def kill(self, manager):
+        if self.killed:
+            return
+        self.killed = True
+        try:
+            self.process.stdin.write(self.final_message(manager).encode("ASCII"))
+            await self.process.stdin.drain()
+            await asyncio.wait_for(self.process.wait(), AiPlayerInterface.FINAL_WAIT)
+        except (OSError, asyncio.TimeoutError):
+            pass
+        if self.process.returncode is None:
+            self.process.kill()
+            await self.process.wait()
+
+
+async def play_game_async(game, player1, player2, verbose=True):
+    """
+    Plays the game to the end like othello_game.play_game, awaiting the
+    players' moves, and returns the same result dictionary.
+    """
+    players = [None, player1, player2]
+    result = start_result(player1, player2)
+
+    while True:
+        player_obj = players[game.current_player]
+        if not game.get_possible_moves():
+            end_result(result, game)
+            break
+        color = "dark" if game.current_player == 1 else "light"
+        try:
+            i, j = await player_obj.get_move(game)
+            if verbose:
+                print("{} ({}) plays {},{}".format(player_obj.name, color, i, j))
+            game.play(i, j)
+            result["moves"] = result["moves"] + 1
+        except (AiTimeoutError, InvalidMoveError) as e:
+            if verbose:
+                print(forfeit_message(player_obj.name, color, e))
+            end_result(result, game, e)
+            break
+
+    if verbose:
+        print(final_message(result))
+    await asyncio.gather(player1.kill(game), player2.kill(game))
+    return result
+
+
+def startup_forfeit(game, started, dark, light):
+    """
+    Returns the result of a game that the player after the started ones
+    forfeited by not starting, with the scripts dark and light as the names
+    of players that did not start.
+    """
+    names = [player.name for player in started] + [dark, light][len(started):]
+    forfeit = len(started) + 1
+    p1score, p2score = get_score(game.board)
+    return {"dark": names[0], "light": names[1], "moves": 0, "forfeit": forfeit,
+            "reason": "timeout", "dark_score": p1score, "light_score": p2score,
+            "winner": 1 if forfeit == 2 else 2}
+
+
+async def run_game_async(task, scripts, slots):
+    """
+    Plays one tournament task (see othello_tournament.make_tasks) once one of
+    the slots is free, and returns its record.
+    """
+    number, dark, light, dimension, mode = task
+    compact = mode == "compact"
+    game = OthelloGameManager(dimension)
+    started = []
+    async with slots:
+        start = time.time()
+        try:
+            for color, script in ((1, scripts[dark]), (2, scripts[light])):
+                started.append(await AsyncAiPlayer.start(script, color, compact,
+                                                         subprocess.DEVNULL))
+            result = await play_game_async(game, started[0], started[1], verbose=False)
+        except AiTimeoutError:
+            # A player did not introduce itself in time and forfeits.
+            result = startup_forfeit(game, started, scripts[dark], scripts[light])
+        finally:
+            await asyncio.gather(*[player.kill(game) for player in started])
+    result["game"] = number
+    result["dark_script"] = dark
+    result["light_script"] = light
+    result["dark_times"] = started[0].move_times if started else []
+    result["light_times"] = started[1].move_times if len(started) > 1 else []
+    result["seconds"] = time.time() - start
+    return result
+
+
+async def run_tasks_async(tasks, scripts, concurrency, log=None):
+    """
+    Plays all the tasks in one event loop, at most concurrency games at a
+    time, and returns the records as the games finish. Each finished game
+    is passed to log if given.
+    """
+    slots = asyncio.Semaphore(concurrency)
+    results = []
+    for finished in asyncio.as_completed([run_game_async(task, scripts, slots)
+                                          for task in tasks]):
+        result = await finished
+        results.append(result)
+        if log is not None:
+            log(result)
+    return results
+
+
+def run_tasks(tasks, scripts, concurrency=64, log=None):
+    return asyncio.run(run_tasks_async(tasks, scripts, concurrency, log))
+
+
+async def main_async(args):
+    game = OthelloGameManager(dimension=args.dimension)
+    started = []
+    try:
+        started.append(await AsyncAiPlayer.start(args.p1_ai1, 1, args.compact))
+        started.append(await AsyncAiPlayer.start(args.p2_ai2, 2, args.compact))
+        await play_game_async(game, started[0], started[1])
+    finally:
+        await asyncio.gather(*[player.kill(game) for player in started])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play one game between two AIs with asyncio.")
+    parser.add_argument("p1_ai1")
+    parser.add_argument("p2_ai2")
+    parser.add_argument("--dimension", type=int, default=4)
+    parser.add_argument("--compact", action="store_true",
+                        help="send only the last move instead of the board (see othello_protocol)")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+COMS W4701 Artificial Intelligence - Programming Homework 2
+
+A bitboard version of the functions in othello_shared. A position is a
+BitBoard: one integer with a bit set for every dark disk, one for every
+light disk, the board dimension, and the Zobrist hash of the disks. The
+square in column i and row j is bit j * dimension + i. Legal moves and flips
+are found for all squares and directions at once with shifts and masks
+instead of walking the board, and play_move updates the hash from the
+placed and flipped disks instead of rehashing the board.
+
+find_lines, get_possible_moves, play_move and get_score take and return
+BitBoards but otherwise behave like their othello_shared counterparts;
+to_bitboard and from_bitboard convert from and to the tuple-of-tuples
+board format used by the game manager.
+
+@author: Yu Liu (yl3957)
+"""
+
+import random
+from collections import namedtuple
+
+BitBoard = namedtuple("BitBoard", ["dark", "light", "dimension", "key"])
+
+# Shift amounts and wrap-around masks per board dimension.
+TABLES = {}
+
+# Zobrist keys per board dimension.
+ZOBRIST = {}
+
+
+def get_tables(dimension):
+    """
+    Returns (full, directions) for the given dimension: the mask of all
+    squares, and for each of the 8 directions a (shift, mask) pair. Shifting
+    a set of squares one step in a direction is ((bits << shift) & mask) for
+    positive shifts and ((bits >> -shift) & mask) for negative ones; the
+    mask drops squares that left the board or wrapped into the next row.
+    """
+    tables = TABLES.get(dimension)
+    if tables is None:
+        n = dimension
+        full = (1 << (n * n)) - 1
+        first_column = 0
+        last_column = 0
+        for j in range(n):
+            first_column = first_column | (1 << (j * n))
+            last_column = last_column | (1 << (j * n + n - 1))
+        not_first = full & ~first_column
+        not_last = full & ~last_column
+        # Same order as the directions in othello_shared.find_lines.
+        directions = [(n, full), (n + 1, not_first), (1, not_first), (-n + 1, not_first),
+                      (-n, full), (-n - 1, not_last), (-1, not_last), (n - 1, not_last)]
+        tables = (full, directions)
+        TABLES[dimension] = tables
+    return tables
+
+
+def get_zobrist(dimension):
+    """
+    Returns (dark_keys, light_keys, flip_keys, side_key) for the given
+    dimension: a random 63-bit key per square for a dark and a light disk,
+    their xor (which turns a disk over), and a key for light to move. The
+    keys come from a fixed seed, so they are the same in every process.
+    """
+    zobrist = ZOBRIST.get(dimension)
+    if zobrist is None:
+        rng = random.Random(dimension)
+        count = dimension * dimension
+        dark_keys = [rng.getrandbits(63) for _ in range(count)]
+        light_keys = [rng.getrandbits(63) for _ in range(count)]
+        flip_keys = [d ^ l for d, l in zip(dark_keys, light_keys)]
+        zobrist = (dark_keys, light_keys, flip_keys, rng.getrandbits(63))
+        ZOBRIST[dimension] = zobrist
+    return zobrist
+
+
+def make_bitboard(dark, light, dimension):
+    """
+    Returns the BitBoard with the given disks, hashing it from scratch.
+    """
+    dark_keys, light_keys, flip_keys, side_key = get_zobrist(dimension)
+    key = 0
+    for square in squares(dark):
+        key = key ^ dark_keys[square]
+    for square in squares(light):
+        key = key ^ light_keys[square]
+    return BitBoard(dark, light, dimension, key)
+
+
+def position_key(bitboard, player):
+    """
+    Returns the hash of the position with player to move.
+    """
+    if player == 2:
+        return bitboard.key ^ get_zobrist(bitboard.dimension)[3]
+    return bitboard.key
+
+
+def shift(bits, amount, mask):
+    if amount > 0:
+        return (bits << amount) & mask
+    return (bits >> -amount) & mask
+
+
+def popcount(bits):
+    return bin(bits).count("1")
+
+
+def to_bitboard(board):
+    """
+    Converts a tuple-of-tuples (or list-of-lists) board to a BitBoard.
+    """
+    n = len(board)
+    dark = 0
+    light = 0
+    for j in range(n):
+        for i in range(n):
+            if board[j][i] == 1:
+                dark = dark | (1 << (j * n + i))
+            elif board[j][i] == 2:
+                light = light | (1 << (j * n + i))
+    return make_bitboard(dark, light, n)
+
+
+def from_bitboard(bitboard):
+    """
+    Converts a BitBoard back to the tuple-of-tuples board format.
+    """
+    n = bitboard.dimension
+    rows = []
+    for j in range(n):
+        row = []
+        for i in range(n):
+            bit = 1 << (j * n + i)
+            if bitboard.dark & bit:
+                row.append(1)
+            elif bitboard.light & bit:
+                row.append(2)
+            else:
+                row.append(0)
+        rows.append(tuple(row))
+    return tuple(rows)
+
+
+def own_and_opponent(bitboard, player):
+    if player == 1:
+        return bitboard.dark, bitboard.light
+    return bitboard.light, bitboard.dark
+
+
+def get_move_mask(bitboard, player):
+    """
+    Returns the set of squares player can play as a bitmask. For each
+    direction, runs of opponent disks adjacent to the player's disks are
+    grown one step at a time; an empty square just past such a run is a move.
+    """
+    own, opponent = own_and_opponent(bitboard, player)
+    n = bitboard.dimension
+    full, directions = get_tables(n)
+    empty = full & ~(own | opponent)
+    moves = 0
+    for amount, mask in directions:
+        run = shift(own, amount, mask) & opponent
+        for _ in range(n - 3):
+            run = run | (shift(run, amount, mask) & opponent)
+        moves = moves | (shift(run, amount, mask) & empty)
+    return moves
+
+
+def get_flips(bitboard, player, square):
+    """
+    Returns the bitmask of opponent disks flipped if player plays the square
+    with the given bit index.
+    """
+    own, opponent = own_and_opponent(bitboard, player)
+    full, directions = get_tables(bitboard.dimension)
+    move = 1 << square
+    flips = 0
+    for amount, mask in directions:
+        line = 0
+        x = shift(move, amount, mask)
+        while x & opponent:
+            line = line | x
+            x = shift(x, amount, mask)
+        if x & own:
+            flips = flips | line
+    return flips
+
+
+def squares(bits):
+    """
+    Returns the bit indices of the set bits, lowest first.
+    """
+    result = []
+    while bits:
+        low = bits & -bits
+        result.append(low.bit_length() - 1)
+        bits = bits ^ low
+    return result
+
+
+def find_lines(bitboard, i, j, player):
+    """
+    Find all the uninterupted lines of stones that would be captured if player
+    plays column i and row j.
+    """
+    n = bitboard.dimension
+    own, opponent = own_and_opponent(bitboard, player)
+    full, directions = get_tables(n)
+    lines = []
+    for amount, mask in directions:
+        line = []
+        x = shift(1 << (j * n + i), amount, mask)
+        while x & opponent:
+            square = x.bit_length() - 1
+            line.append((square % n, square // n))
+            x = shift(x, amount, mask)
+        if x & own and line:
+            lines.append(line)
+    return lines
+
+
+def get_possible_moves(bitboard, player):
+    """
+    Return a list of all possible (column,row) tuples that player can play on
+    the current board, in the same order as othello_shared.
+    """
+    n = bitboard.dimension
+    return sorted((square % n, square // n)
+                  for square in squares(get_move_mask(bitboard, player)))
+
+
+def play_move(bitboard, player, i, j):
+    """
+    Returns the BitBoard after player plays column i and row j.
+    """
+    return play_square(bitboard, player, j * bitboard.dimension + i)
+
+
+def play_square(bitboard, player, square):
+    """
+    Returns the BitBoard after player plays the square with the given bit
+    index.
+    """
+    flips = get_flips(bitboard, player, square)
+    dark_keys, light_keys, flip_keys, side_key = get_zobrist(bitboard.dimension)
+    key = bitboard.key
+    for flipped in squares(flips):
+        key = key ^ flip_keys[flipped]
+    flips = flips | (1 << square)
+    if player == 1:
+        return BitBoard(bitboard.dark | flips, bitboard.light & ~flips, bitboard.dimension,
+                        key ^ dark_keys[square])
+    return BitBoard(bitboard.dark & ~flips, bitboard.light | flips, bitboard.dimension,
+                    key ^ light_keys[square])
+
+
+def get_score(bitboard):
+    return popcount(bitboard.dark), popcount(bitboard.light)
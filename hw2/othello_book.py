@@ -0,0 +1,198 @@
+"""
+COMS W4701 Artificial Intelligence - Programming Homework 2
+
+Opening books for Othello, one per board size.
+
+A book maps positions to the move a deep search found best. Positions are
+stored relative to the player to move (that player's disks, then the
+opponent's) and reduced by the 8 symmetries of the square, so each entry
+covers every rotation and reflection of its position and both colors (see
+othello_symmetry.canonical). The stored move is in the frame of the
+canonical form; lookups map it back.
+
+The book file starts with the magic bytes OBK1, the board dimension (one
+byte) and the number of entries (four bytes, little endian), followed by
+the entries sorted by position. Each entry holds the own and opponent
+bitmasks (ceil(n * n / 8) bytes each), the move square and the search depth
+(one byte each) and the value (four bytes, signed).
+
+The build command searches every position up to the given number of plies
+from the initial position of OthelloGameManager to a fixed depth, one ply
+at a time on a process pool, and writes the book.
+
+Usage: python othello_book.py build [--dimension 8] [--plies 6]
+           [--depth 6] [--processes N] [-o FILE]
+       python othello_book.py show [--dimension 8] [-f FILE]
+
+@author: Yu Liu (yl3957)
+"""
+
+import argparse
+import os
+import struct
+import sys
+import time
+from multiprocessing import Pool
+
+from othello_bitboard import (get_move_mask, make_bitboard, own_and_opponent, play_square,
+                              squares, to_bitboard)
+from othello_game import OthelloGameManager
+from othello_symmetry import canonical, from_canonical_square
+from othello_transposition import TranspositionTable
+
+MAGIC = b"OBK1"
+ENTRY_TAIL = struct.Struct("<BBi")
+
+# Books are looked up next to this module unless another file is given.
+BOOK_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def book_filename(dimension, directory=BOOK_DIRECTORY):
+    return os.path.join(directory, "othello_book_{}.bin".format(dimension))
+
+
+class OpeningBook(object):
+    """
+    An opening book loaded from a file. lookup(bitboard, player) returns the
+    book move for player as a square (bit index), or None.
+    """
+
+    def __init__(self, filename):
+        self.entries = {}
+        with open(filename, "rb") as f:
+            header = f.read(len(MAGIC) + 5)
+            if header[:len(MAGIC)] != MAGIC:
+                raise ValueError("{} is not an opening book.".format(filename))
+            self.dimension = header[len(MAGIC)]
+            count = struct.unpack("<I", header[len(MAGIC) + 1:])[0]
+            width = (self.dimension * self.dimension + 7) // 8
+            size = 2 * width + ENTRY_TAIL.size
+            data = f.read(count * size)
+        if len(data) != count * size:
+            raise ValueError("{} is truncated.".format(filename))
+        for offset in range(0, len(data), size):
+            own = int.from_bytes(data[offset:offset + width], "little")
+            opponent = int.from_bytes(data[offset + width:offset + 2 * width], "little")
+            self.entries[(own, opponent)] = ENTRY_TAIL.unpack_from(data, offset + 2 * width)
+
+    def probe(self, bitboard, player):
+        """
+        Returns (square, depth, value) for the position, or None.
+        """
+        own, opponent = own_and_opponent(bitboard, player)
+        own, opponent, symmetry = canonical(own, opponent, bitboard.dimension)
+        entry = self.entries.get((own, opponent))
+        if entry is None:
+            return None
+        move, depth, value = entry
+        return from_canonical_square(move, symmetry, bitboard.dimension), depth, value
+
+    def lookup(self, bitboard, player):
+        entry = self.probe(bitboard, player)
+        if entry is None or not get_move_mask(bitboard, player) & (1 << entry[0]):
+            return None
+        return entry[0]
+
+
+def write_book(filename, dimension, entries):
+    """
+    Writes entries, a dictionary from canonical (own, opponent) to (move,
+    depth, value), to a book file.
+    """
+    width = (dimension * dimension + 7) // 8
+    with open(filename, "wb") as f:
+        f.write(MAGIC + bytes([dimension]) + struct.pack("<I", len(entries)))
+        for own, opponent in sorted(entries):
+            move, depth, value = entries[(own, opponent)]
+            f.write(own.to_bytes(width, "little") + opponent.to_bytes(width, "little")
+                    + ENTRY_TAIL.pack(move, depth, value))
+
+
+def search_position(task):
+    """
+    Searches a canonical position (with the player to move as dark) to a
+    fixed depth in a pool worker and returns (move square, value).
+    """
+    # Imported here because yl3957_ai itself reads books through this module.
+    from yl3957_ai import AlphaBetaSearch
+
+    own, opponent, dimension, depth = task
+    engine = AlphaBetaSearch(time_limit=None, depth_limit=depth, log=None,
+                             table=TranspositionTable(16))
+    board = make_bitboard(own, opponent, dimension)
+    move = engine.select_move(board, 1)
+    return move[1] * dimension + move[0], engine.value
+
+
+def build_book(dimension, plies, depth, processes=None, log=sys.stderr):
+    """
+    Searches every position reachable in fewer than plies plies from the
+    initial position to the given depth, and returns the book entries.
+    """
+    start = to_bitboard(OthelloGameManager(dimension).create_initial_board())
+    own, opponent, symmetry = canonical(start.dark, start.light, dimension)
+    layer = {(own, opponent)}
+    entries = {}
+    pool = Pool(processes)
+    try:
+        for ply in range(plies):
+            positions = sorted(layer)
+            started = time.time()
+            results = pool.map(search_position, [(own, opponent, dimension, depth)
+                                                 for own, opponent in positions])
+            layer = set()
+            for (own, opponent), (move, value) in zip(positions, results):
+                entries[(own, opponent)] = (move, depth, value)
+                board = make_bitboard(own, opponent, dimension)
+                for square in squares(get_move_mask(board, 1)):
+                    child = play_square(board, 1, square)
+                    # The opponent moves next, so it becomes "own".
+                    if not get_move_mask(child, 2):
+                        continue
+                    key = canonical(child.light, child.dark, dimension)[:2]
+                    if key not in entries:
+                        layer.add(key)
+            if log is not None:
+                log.write("ply {}: {} positions in {:.1f}s\n".format(
+                    ply, len(positions), time.time() - started))
+                log.flush()
+    finally:
+        pool.close()
+        pool.join()
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or show an Othello opening book.")
+    subparsers = parser.add_subparsers(dest="command")
+    build_parser = subparsers.add_parser("build")
+    build_parser.add_argument("--dimension", type=int, default=8)
+    build_parser.add_argument("--plies", type=int, default=6)
+    build_parser.add_argument("--depth", type=int, default=6)
+    build_parser.add_argument("--processes", type=int, default=None)
+    build_parser.add_argument("-o", "--output", help="book file (default: next to this module)")
+    show_parser = subparsers.add_parser("show")
+    show_parser.add_argument("--dimension", type=int, default=8)
+    show_parser.add_argument("-f", "--file", help="book file (default: next to this module)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        entries = build_book(args.dimension, args.plies, args.depth, args.processes)
+        filename = args.output or book_filename(args.dimension)
+        write_book(filename, args.dimension, entries)
+        print("{} positions written to {}".format(len(entries), filename))
+    elif args.command == "show":
+        book = OpeningBook(args.file or book_filename(args.dimension))
+        n = book.dimension
+        print("{}x{} book, {} positions".format(n, n, len(book.entries)))
+        start = to_bitboard(OthelloGameManager(n).create_initial_board())
+        entry = book.probe(start, 1)
+        if entry is not None:
+            move, depth, value = entry
+            print("First move {},{} (depth {}, value {})".format(move % n, move // n, depth, value))
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
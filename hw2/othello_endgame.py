@@ -0,0 +1,225 @@
+"""
+COMS W4701 Artificial Intelligence - Programming Homework 2
+
+Exact endgame solver for Othello BitBoards.
+
+Once few squares are empty, the game tree can be searched to the end. The
+leaves are then scored exactly with get_score rather than with a heuristic,
+as in the game manager: the game ends when the player to move has no legal
+move. The solver either finds the exact final disk differential or, with
+a null window around zero, only whether the game is won, drawn or lost,
+which is much faster. Moves are ordered by mobility (fewest replies for the
+opponent first) while many squares are empty, and by parity (moves into
+regions of the board with an odd number of empty squares first) near the
+end. Positions with enough empty squares are kept in the solver's own
+transposition table.
+
+The command line solves random positions with a given number of empty
+squares and reports the time per position, to tune the number of empty
+squares at which yl3957_ai switches to the solver.
+
+Usage: python othello_endgame.py [--dimension 8] [--empties 8,10,12]
+           [--positions 5] [--seed 0] [--wld]
+
+@author: Yu Liu (yl3957)
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from othello_bitboard import (get_move_mask, get_score, get_tables, play_square,
+                              popcount, position_key, squares, to_bitboard)
+from othello_game import OthelloGameManager
+from othello_transposition import EXACT, LOWER, NO_MOVE, UPPER, TranspositionTable
+
+# Parity regions (the four quadrants) per board dimension.
+REGIONS = {}
+
+
+class SolverTimeout(Exception):
+    pass
+
+
+def get_regions(dimension):
+    regions = REGIONS.get(dimension)
+    if regions is None:
+        n = dimension
+        half = (n + 1) // 2
+        regions = [0, 0, 0, 0]
+        for j in range(n):
+            for i in range(n):
+                regions[(i >= half) + 2 * (j >= half)] |= 1 << (j * n + i)
+        REGIONS[dimension] = regions
+    return regions
+
+
+def disk_difference(board, player):
+    dark, light = get_score(board)
+    return dark - light if player == 1 else light - dark
+
+
+class EndgameSolver(object):
+    """
+    Alpha-beta search to the end of the game, in negamax form. Values are
+    final disk differentials for the player to move.
+    """
+
+    CHECK_INTERVAL = 1024
+
+    # Mobility ordering is used above this many empty squares, parity
+    # ordering only at or below it.
+    MOBILITY_EMPTIES = 6
+
+    # Positions with fewer empty squares are not stored in the table.
+    HASH_EMPTIES = 5
+
+    def __init__(self, table=None):
+        self.table = TranspositionTable(16) if table is None else table
+        self.deadline = None
+        self.stop = None
+        self.nodes = 0
+
+    def order(self, board, player, moves, empties):
+        """
+        Returns the (square, child board) pairs for the moves, best first.
+        """
+        full = get_tables(board.dimension)[0]
+        empty = full & ~(board.dark | board.light)
+        odd = 0
+        for region in get_regions(board.dimension):
+            if popcount(empty & region) % 2:
+                odd = odd | region
+        opponent = 1 if player == 2 else 2
+        keyed = []
+        for square in squares(moves):
+            child = play_square(board, player, square)
+            even = not (odd >> square) & 1
+            if empties > EndgameSolver.MOBILITY_EMPTIES:
+                keyed.append((popcount(get_move_mask(child, opponent)), even, square, child))
+            else:
+                keyed.append((0, even, square, child))
+        keyed.sort(key=lambda entry: entry[:3])
+        return [(square, child) for _, _, square, child in keyed]
+
+    def search(self, board, player, alpha, beta, empties):
+        self.nodes = self.nodes + 1
+        if self.nodes % EndgameSolver.CHECK_INTERVAL == 0:
+            if self.stop is not None and self.stop.is_set():
+                raise SolverTimeout
+            if self.deadline is not None and time.time() > self.deadline:
+                raise SolverTimeout
+        moves = get_move_mask(board, player)
+        if not moves:
+            return disk_difference(board, player), NO_MOVE
+
+        use_table = empties >= EndgameSolver.HASH_EMPTIES
+        hash_move = NO_MOVE
+        if use_table:
+            key = position_key(board, player)
+            entry = self.table.probe(key)
+            if entry is not None:
+                value, bound, depth, hash_move = entry
+                if (bound == EXACT or (bound == LOWER and value >= beta)
+                        or (bound == UPPER and value <= alpha)):
+                    return value, hash_move
+
+        ordered = self.order(board, player, moves, empties)
+        if hash_move != NO_MOVE:
+            ordered.sort(key=lambda entry: entry[0] != hash_move)
+        opponent = 1 if player == 2 else 2
+        original_alpha = alpha
+        best = None
+        best_move = NO_MOVE
+        for square, child in ordered:
+            value = -self.search(child, opponent, -beta, -alpha, empties - 1)[0]
+            if best is None or value > best:
+                best = value
+                best_move = square
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                break
+        if use_table:
+            if best <= original_alpha:
+                bound = UPPER
+            elif best >= beta:
+                bound = LOWER
+            else:
+                bound = EXACT
+            self.table.store(key, best, bound, empties, best_move)
+        return best, best_move
+
+    def solve(self, board, player, exact=True, deadline=None, stop=None):
+        """
+        Solves the BitBoard for player and returns (value, square): the final
+        disk differential under perfect play and a move that achieves it, or
+        with exact=False only its sign (1 win, 0 draw, -1 loss). Raises
+        SolverTimeout if the deadline (a time.time() value) passes or the
+        stop event is set first.
+        """
+        self.deadline = deadline
+        self.stop = stop
+        self.nodes = 0
+        self.table.new_search()
+        n = board.dimension
+        empties = n * n - popcount(board.dark | board.light)
+        if exact:
+            value, square = self.search(board, player, -n * n - 1, n * n + 1, empties)
+            return value, square
+        value, square = self.search(board, player, -1, 1, empties)
+        return max(-1, min(1, value)), square
+
+
+def random_position(rng, dimension, empties):
+    """
+    Returns (board, player) after random play from the initial position until
+    the given number of squares is empty, or None if the game ended first.
+    """
+    board = to_bitboard(OthelloGameManager(dimension).create_initial_board())
+    player = 1
+    while dimension * dimension - popcount(board.dark | board.light) > empties:
+        moves = squares(get_move_mask(board, player))
+        if not moves:
+            return None
+        board = play_square(board, player, rng.choice(moves))
+        player = 1 if player == 2 else 2
+    if not get_move_mask(board, player):
+        return None
+    return board, player
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the endgame solver on random positions.")
+    parser.add_argument("--dimension", type=int, default=8)
+    parser.add_argument("--empties", default="8,10,12")
+    parser.add_argument("--positions", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--wld", action="store_true", help="only solve for win, draw or loss")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    n = args.dimension
+    for empties in [int(empties) for empties in args.empties.split(",")]:
+        times = []
+        for _ in range(args.positions):
+            position = None
+            while position is None:
+                position = random_position(rng, n, empties)
+            board, player = position
+            solver = EndgameSolver()
+            start = time.time()
+            value, square = solver.solve(board, player, not args.wld)
+            elapsed = time.time() - start
+            times.append(elapsed)
+            print("{} empties: move {},{} value {:+d}, {} nodes, {:.3f}s".format(
+                empties, square % n, square // n, value, solver.nodes, elapsed))
+        times.sort()
+        print("{} empties: median {:.3f}s, max {:.3f}s".format(
+            empties, times[len(times) // 2], times[-1]))
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
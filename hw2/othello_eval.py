@@ -0,0 +1,276 @@
+"""
+COMS W4701 Artificial Intelligence - Programming Homework 2
+
+Heuristic evaluation of Othello BitBoards.
+
+The evaluation is a weighted sum of features, each counted for dark minus
+light: disks, mobility (number of legal moves), disks on each class of
+square (corners, the C squares next to a corner on an edge, the X squares
+diagonally next to a corner, other edge squares, the second ring and the
+inner squares) and edge-stable disks (disks on an edge line that cannot be
+flipped along that line: runs from a corner, or all disks of a full line).
+
+Everything but mobility is read from pattern tables. Each row of the board
+is encoded as a base-3 number (digit 0 for empty, 1 for dark, 2 for light),
+which is computed from the row's dark and light bitmasks with one lookup
+each, and a per-row table gives the row's weighted disk, square class and
+edge stability terms. The two edge columns are gathered into row form with
+one multiplication each and looked up in an edge stability table. A leaf
+therefore costs a dozen table lookups plus the move generation for
+mobility.
+
+features() computes the same features directly and slowly, for checking.
+Weights fitted to recorded games by othello_tune are kept in a JSON file per
+board size, read by load_weights. The command line is a micro-benchmark that
+checks the tables against features() and reports evaluations per second.
+
+Usage: python othello_eval.py [--dimension 8] [--positions 1000]
+           [--repeat 10] [--seed 0]
+
+@author: Yu Liu (yl3957)
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+from othello_bitboard import get_move_mask, popcount
+
+FEATURES = ["discs", "mobility", "corners", "c_squares", "x_squares", "edges",
+            "second_ring", "inner", "stable_edges"]
+
+SQUARE_CLASSES = ["corners", "c_squares", "x_squares", "edges", "second_ring", "inner"]
+
+DEFAULT_WEIGHTS = {"discs": 1, "mobility": 8, "corners": 30, "c_squares": -8,
+                   "x_squares": -15, "edges": 4, "second_ring": -2, "inner": 0,
+                   "stable_edges": 10}
+
+# Evaluators per (dimension, weights).
+EVALUATORS = {}
+
+# Weights files are looked up next to this module unless another is given.
+WEIGHTS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def weights_filename(dimension, directory=WEIGHTS_DIRECTORY):
+    return os.path.join(directory, "othello_weights_{}.json".format(dimension))
+
+
+def load_weights(filename):
+    """
+    Returns the weights dictionary of a weights file written by othello_tune.
+    """
+    with open(filename) as f:
+        weights = json.load(f)["weights"]
+    missing = [name for name in FEATURES if name not in weights]
+    if missing:
+        raise ValueError("{} has no weights for {}.".format(filename, ", ".join(missing)))
+    return dict((name, int(weights[name])) for name in FEATURES)
+
+
+def square_class(i, j, n):
+    """
+    Returns the name of the class of the square in column i and row j.
+    """
+    di = min(i, n - 1 - i)
+    dj = min(j, n - 1 - j)
+    near, far = min(di, dj), max(di, dj)
+    if near == 0 and far == 0:
+        return "corners"
+    if near == 0 and far == 1:
+        return "c_squares"
+    if near == 1 and far == 1:
+        return "x_squares"
+    if near == 0:
+        return "edges"
+    if near == 1:
+        return "second_ring"
+    return "inner"
+
+
+def stable_line(cells):
+    """
+    Returns the number of dark minus light disks in the line of cells (0, 1
+    or 2) that are stable along the line.
+    """
+    signs = [0, 1, -1]
+    if all(cells):
+        return sum(signs[cell] for cell in cells)
+    total = 0
+    for line in (cells, cells[::-1]):
+        if line[0]:
+            run = 0
+            while line[run] == line[0]:
+                run = run + 1
+            total = total + signs[line[0]] * run
+    return total
+
+
+def board_cells(board):
+    n = board.dimension
+    return [[1 if board.dark >> (j * n + i) & 1 else 2 if board.light >> (j * n + i) & 1 else 0
+             for i in range(n)] for j in range(n)]
+
+
+def features(board, color, moves=None):
+    """
+    Returns the feature values of the BitBoard for color, in the order of
+    FEATURES, computed square by square.
+    """
+    n = board.dimension
+    cells = board_cells(board)
+    sign = [0, 1, -1]
+    values = dict((name, 0) for name in FEATURES)
+    for j in range(n):
+        for i in range(n):
+            values["discs"] = values["discs"] + sign[cells[j][i]]
+            name = square_class(i, j, n)
+            values[name] = values[name] + sign[cells[j][i]]
+    columns = [[cells[j][i] for j in range(n)] for i in range(n)]
+    values["stable_edges"] = (stable_line(cells[0]) + stable_line(cells[n - 1])
+                              + stable_line(columns[0]) + stable_line(columns[n - 1]))
+    dark_moves = moves if moves is not None and color == 1 else get_move_mask(board, 1)
+    light_moves = moves if moves is not None and color == 2 else get_move_mask(board, 2)
+    values["mobility"] = popcount(dark_moves) - popcount(light_moves)
+    result = [values[name] for name in FEATURES]
+    if color == 2:
+        result = [-value for value in result]
+    return result
+
+
+class Evaluator(object):
+    """
+    The table-driven evaluation for one board dimension and set of weights.
+    evaluate(board, color, moves) returns the integer value of the BitBoard
+    for color; moves is color's move mask, if the caller already has it.
+    No value is larger than self.bound in magnitude.
+    """
+
+    def __init__(self, dimension, weights=None):
+        n = dimension
+        self.dimension = n
+        self.weights = dict(DEFAULT_WEIGHTS if weights is None else weights)
+        self.row_mask = (1 << n) - 1
+        self.ternary = [sum(3 ** i for i in range(n) if bits >> i & 1)
+                        for bits in range(1 << n)]
+        first_column = 0
+        magic = 0
+        for k in range(n):
+            first_column = first_column | (1 << (k * n))
+            magic = magic | (1 << ((n - 1) * (k + 1)))
+        # ((bits >> c) & first_column) * magic moves the bit of row k of
+        # column c to bit n * (n - 1) + k, without carries.
+        self.first_column = first_column
+        self.magic = magic
+        self.column_shift = n * (n - 1)
+
+        codes = [self.decode(code) for code in range(3 ** n)]
+        sign = [0, 1, -1]
+        w = self.weights
+        stable = [w["stable_edges"] * stable_line(cells) for cells in codes]
+        self.row_tables = [None] * n
+        for j in range((n + 1) // 2):
+            square_weights = [w["discs"] + w[square_class(i, j, n)] for i in range(n)]
+            table = []
+            for code, cells in enumerate(codes):
+                value = sum(square_weights[i] * sign[cells[i]] for i in range(n))
+                if j == 0:
+                    value = value + stable[code]
+                table.append(value)
+            self.row_tables[j] = table
+            self.row_tables[n - 1 - j] = table
+        self.edge_table = stable
+        # Neither player can have more moves than there are squares.
+        self.bound = (sum(max(abs(value) for value in table) for table in self.row_tables)
+                      + 2 * max(abs(value) for value in stable)
+                      + abs(w["mobility"]) * n * n)
+
+    def decode(self, code):
+        cells = []
+        for _ in range(self.dimension):
+            cells.append(code % 3)
+            code = code // 3
+        return cells
+
+    def evaluate(self, board, color, moves=None):
+        n = self.dimension
+        dark = board.dark
+        light = board.light
+        mask = self.row_mask
+        ternary = self.ternary
+        value = 0
+        shift = 0
+        for table in self.row_tables:
+            value = value + table[ternary[(dark >> shift) & mask]
+                                  + 2 * ternary[(light >> shift) & mask]]
+            shift = shift + n
+        first_column = self.first_column
+        magic = self.magic
+        column_shift = self.column_shift
+        for column in (0, n - 1):
+            dark_column = ((((dark >> column) & first_column) * magic) >> column_shift) & mask
+            light_column = ((((light >> column) & first_column) * magic) >> column_shift) & mask
+            value = value + self.edge_table[ternary[dark_column] + 2 * ternary[light_column]]
+        opponent = 1 if color == 2 else 2
+        if moves is None:
+            moves = get_move_mask(board, color)
+        mobility = popcount(moves) - popcount(get_move_mask(board, opponent))
+        if color == 2:
+            value = -value
+        return value + self.weights["mobility"] * mobility
+
+
+def get_evaluator(dimension, weights=None):
+    key = (dimension, None if weights is None else tuple(sorted(weights.items())))
+    evaluator = EVALUATORS.get(key)
+    if evaluator is None:
+        evaluator = Evaluator(dimension, weights)
+        EVALUATORS[key] = evaluator
+    return evaluator
+
+
+def main():
+    from othello_endgame import random_position
+
+    parser = argparse.ArgumentParser(description="Benchmark the Othello evaluation.")
+    parser.add_argument("--dimension", type=int, default=8)
+    parser.add_argument("--positions", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    n = args.dimension
+    positions = []
+    while len(positions) < args.positions:
+        position = random_position(rng, n, rng.randint(1, n * n - 5))
+        if position is not None:
+            positions.append(position)
+
+    start = time.perf_counter()
+    evaluator = get_evaluator(n)
+    print("tables built in {:.3f}s".format(time.perf_counter() - start))
+    weights = [evaluator.weights[name] for name in FEATURES]
+    for board, color in positions:
+        expected = sum(w * f for w, f in zip(weights, features(board, color)))
+        if evaluator.evaluate(board, color) != expected:
+            raise AssertionError("table evaluation differs from features() on {}".format(board))
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for board, color in positions:
+            evaluator.evaluate(board, color)
+    elapsed = time.perf_counter() - start
+    print("{:.0f} evaluations/s".format(args.repeat * len(positions) / elapsed))
+
+    start = time.perf_counter()
+    for board, color in positions:
+        features(board, color)
+    elapsed = time.perf_counter() - start
+    print("{:.0f} evaluations/s square by square".format(len(positions) / elapsed))
+
+
+if __name__ == "__main__":
+    main()
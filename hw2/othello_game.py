@@ -8,10 +8,17 @@ players.
 
 @author: Daniel Bauer 
 """
+import argparse
+import importlib.util
+import os
+import signal
 import sys
 import subprocess
+import threading
+import time
 from threading import Timer
 from othello_shared import find_lines, get_possible_moves, play_move, get_score
+from othello_protocol import format_board, format_move
 
 class InvalidMoveError(RuntimeError):
     pass
@@ -33,46 +40,188 @@ class AiPlayerInterface(Player):
 
     TIMEOUT = 10 
 
-    def __init__(self, filename, color):
+    # Seconds an AI gets to read the final score and finish up.
+    FINAL_WAIT = 1
+
+    def __init__(self, filename, color, compact=False, verbose=True, stderr=None):
         self.color = color
-        self.process = subprocess.Popen(['python',filename], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
-        name = self.process.stdout.readline().decode("ASCII").strip()
-        print("AI introduced itself as: {}".format(name))
+        self.compact = compact
+        self.synced = False
+        self.move_times = []
+        self.killed = False
+        self.process = subprocess.Popen([sys.executable,filename], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=stderr)
+        name = self.process.stdout.readline().decode("ASCII", "replace").strip()
+        if verbose:
+            print("AI introduced itself as: {}".format(name))
         self.name = name
-        self.process.stdin.write((str(color)+"\n").encode("ASCII"))
-        self.process.stdin.flush()
+        try:
+            self.process.stdin.write((str(color)+"\n").encode("ASCII"))
+            self.process.stdin.flush()
+        except OSError:
+            # An AI that already exited forfeits on its first move.
+            pass
 
     def timeout(self): 
         sys.stderr.write("{} timed out.".format(self.name))
         self.process.kill() 
         self.timed_out = True
 
-    def get_move(self, manager):
+    def turn_message(self, manager):
+        """
+        Returns the text sent to the AI when it is its turn.
+        """
+        if not self.compact:
+            white_score, dark_score = get_score(manager.board)
+            return "SCORE {} {}\n{}\n".format(white_score, dark_score, str(manager.board))
+        if not self.synced or manager.last_move is None:
+            # The AI keeps its own board after the first one, and only hears
+            # about the opponent's moves.
+            self.synced = True
+            return format_board(manager.board) + "\n"
+        return format_move(*manager.last_move) + "\n"
+
+    def final_message(self, manager):
         white_score, dark_score = get_score(manager.board)
-        self.process.stdin.write("SCORE {} {}\n".format(white_score, dark_score).encode("ASCII"))
-        self.process.stdin.flush()
-        self.process.stdin.write("{}\n".format(str(manager.board)).encode("ASCII"))
-        self.process.stdin.flush()
+        return "FINAL {} {}\n".format(white_score, dark_score)
+
+    def not_running(self):
+        """
+        Returns the error for a move asked of an AI that has exited or
+        crashed, which forfeits the game.
+        """
+        return InvalidMoveError("{} is not running.".format(self.name))
+
+    def parse_move(self, line, dimension):
+        """
+        Returns the move (i, j) in the line of bytes the AI sent, and raises
+        InvalidMoveError unless it names a square of the board.
+        """
+        try:
+            i_s, j_s = line.decode("ASCII").strip().split()
+            i, j = int(i_s), int(j_s)
+        except ValueError:
+            # Also covers UnicodeDecodeError.
+            raise InvalidMoveError("Malformed move {!r}.".format(line))
+        if not (0 <= i < dimension and 0 <= j < dimension):
+            raise InvalidMoveError("Move {},{} is off the board.".format(i, j))
+        return i, j
+
+    def get_move(self, manager):
+        try:
+            self.process.stdin.write(self.turn_message(manager).encode("ASCII"))
+            self.process.stdin.flush()
+        except OSError:
+            raise self.not_running()
 
         timer = Timer(AiPlayerInterface.TIMEOUT, lambda: self.timeout())
         self.timed_out = False
+        start = time.time()
         timer.start()
 
         # Wait for the AI call
-        move_s = self.process.stdout.readline().decode("ASCII") 
+        move_s = self.process.stdout.readline()
 
         if self.timed_out:  
             raise AiTimeoutError
         timer.cancel()
-        i_s, j_s = move_s.strip().split()
-        i = int(i_s)
-        j = int(j_s)
-        return i,j 
+        self.move_times.append(time.time() - start)
+        return self.parse_move(move_s, manager.dimension)
     
     def kill(self,manager):
-        white_score, dark_score = get_score(manager.board)
-        self.process.stdin.write("FINAL {} {}\n".format(white_score, dark_score).encode("ASCII"))
-        self.process.kill() 
+        if self.killed:
+            return
+        self.killed = True
+        try:
+            self.process.stdin.write(self.final_message(manager).encode("ASCII"))
+            self.process.stdin.flush()
+            self.process.wait(timeout=AiPlayerInterface.FINAL_WAIT)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        self.process.kill()
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass 
+
+
+def load_ai_module(filename, name):
+    """
+    Loads the AI script filename as a new module called name, so that two
+    players loading the same script do not share any state. The script's
+    directory is added to the import path for its own imports.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    spec = importlib.util.spec_from_file_location(name, filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def call_with_cpu_limit(function, args, seconds):
+    """
+    Returns function(*args), raising AiTimeoutError if the call used more
+    than seconds of CPU time. In the main thread on Unix the call is
+    interrupted when the limit runs out (with a SIGPROF timer); elsewhere
+    the CPU time is only checked after the call returns.
+    """
+    interrupt = (hasattr(signal, "setitimer")
+                 and threading.current_thread() is threading.main_thread())
+    if interrupt:
+        def expired(signum, frame):
+            raise AiTimeoutError
+        previous = signal.signal(signal.SIGPROF, expired)
+        signal.setitimer(signal.ITIMER_PROF, seconds)
+    start = time.process_time()
+    try:
+        result = function(*args)
+    finally:
+        if interrupt:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, previous)
+    if time.process_time() - start > seconds:
+        raise AiTimeoutError
+    return result
+
+
+class InProcessPlayer(Player):
+    """
+    An AI loaded into the manager's own process. The AI script has to
+    provide select_move(board, color), which is called directly with a
+    tuple-of-tuples board, without a subprocess or a pipe. Each call may
+    use up to time_limit seconds of CPU time. options maps module-level
+    names of the script to values to set after loading it, e.g.
+    {"TIME_LIMIT": 0.1} for a faster yl3957_ai.
+    """
+
+    COUNT = 0
+
+    def __init__(self, filename, color, time_limit=None, options=None):
+        InProcessPlayer.COUNT = InProcessPlayer.COUNT + 1
+        stem = os.path.splitext(os.path.basename(filename))[0]
+        module = load_ai_module(filename, "{}_{}".format(stem, InProcessPlayer.COUNT))
+        for key, value in (options or {}).items():
+            setattr(module, key, value)
+        self.select_move = module.select_move
+        self.name = stem
+        self.color = color
+        self.time_limit = AiPlayerInterface.TIMEOUT if time_limit is None else time_limit
+        self.move_times = []
+
+    def get_move(self, manager):
+        board = tuple(tuple(row) for row in manager.board)
+        start = time.process_time()
+        move = call_with_cpu_limit(self.select_move, (board, self.color), self.time_limit)
+        self.move_times.append(time.process_time() - start)
+        try:
+            i, j = move
+            return int(i), int(j)
+        except (TypeError, ValueError):
+            raise InvalidMoveError("Malformed move {!r}.".format(move))
+
+    def kill(self, manager):
+        pass
 
 
 class OthelloGameManager(object):
@@ -82,6 +231,8 @@ class OthelloGameManager(object):
         self.dimension = dimension
         self.board = self.create_initial_board()
         self.current_player = 1
+        self.last_move = None
+        self.moves = []
             
     def create_initial_board(self):
         board = []
@@ -108,6 +259,8 @@ class OthelloGameManager(object):
        
             
     def play(self, i,j):
+        if not (0 <= i < self.dimension and 0 <= j < self.dimension):
+           raise InvalidMoveError("Off the board.")
         if self.board[j][i] != 0:
            raise InvalidMoveError("Occupied square.")
         lines = find_lines(self.board, i,j, self.current_player)
@@ -115,48 +268,103 @@ class OthelloGameManager(object):
            raise InvalidMoveError("Invalid Move.")
      
         self.board = play_move(self.board, self.current_player, i, j) 
+        self.last_move = (i, j)
+        self.moves.append((i, j))
         self.current_player = 1 if self.current_player == 2 else 2
 
     def get_possible_moves(self):
         return get_possible_moves(self.board, self.current_player)
 
-def play_game(game, player1, player2):
+def start_result(player1, player2):
+    return {"dark": player1.name, "light": player2.name, "moves": 0,
+            "forfeit": None, "reason": None}
+
+
+def end_result(result, game, error=None):
+    """
+    Fills in the final disk counts and the winner of a game that is over, or
+    that the player to move forfeited with an AiTimeoutError or
+    InvalidMoveError error.
+    """
+    p1score, p2score = get_score(game.board)
+    result["dark_score"] = p1score
+    result["light_score"] = p2score
+    if error is None:
+        result["winner"] = 1 if p1score > p2score else 2 if p2score > p1score else 0
+    else:
+        result["forfeit"] = game.current_player
+        result["reason"] = "timeout" if isinstance(error, AiTimeoutError) else "invalid move"
+        result["winner"] = 1 if game.current_player == 2 else 2
+    return result
+
+
+def forfeit_message(name, color, error):
+    if isinstance(error, AiTimeoutError):
+        return "{} ({}) timed out!".format(name, color)
+    return "{} ({}) made an invalid move: {}".format(name, color, error)
+
+
+def final_message(result):
+    return "FINAL: {} (dark) {}:{} {} (light)".format(
+        result["dark"], result["dark_score"], result["light_score"], result["light"])
+
+
+def play_game(game, player1, player2, verbose=True):
+    """
+    Plays the game to the end and returns the result as a dictionary with
+    the players' names, the final disk counts, the winner (1 for dark, 2 for
+    light, 0 for a draw) and, if a player lost by timing out or by an
+    invalid move, its color and the reason. Progress is printed if verbose.
+    """
 
     players = [None, player1, player2]
+    result = start_result(player1, player2)
 
     while True: 
         player_obj = players[game.current_player]
         possible_moves = game.get_possible_moves() 
         if not possible_moves: 
-            p1score, p2score = get_score(game.board)
-            print("FINAL: {} (dark) {}:{} {} (light)".format(player1.name, p1score, p2score, player2.name))
-            player1.kill(game)
-            player2.kill(game)
+            end_result(result, game)
             break 
         else: 
             color = "dark" if game.current_player == 1 else "light"
             try: 
                 i, j = player_obj.get_move(game)
-                print("{} ({}) plays {},{}".format(player_obj.name, color, i,j))
+                if verbose:
+                    print("{} ({}) plays {},{}".format(player_obj.name, color, i,j))
                 game.play(i,j)
-            except AiTimeoutError:
-                print("{} ({}) timed out!".format(player_obj.name, color))
-                print("FINAL: {} (dark) {}:{} {} (light)".format(player_obj.name, p1score, p2score, player2.name))
-                player1.kill(game)
-                player2.kill(game)
+                result["moves"] = result["moves"] + 1
+            except (AiTimeoutError, InvalidMoveError) as e:
+                if verbose:
+                    print(forfeit_message(player_obj.name, color, e))
+                end_result(result, game, e)
                 break
 
+    if verbose:
+        print(final_message(result))
+    player1.kill(game)
+    player2.kill(game)
+    return result
 
-     
-    
 
 if __name__ == "__main__":
 
 
-    if not len(sys.argv) == 3: 
-        print("Usage: python othello_game [p1_ai1.py] [p2_ai2.py]")
+    parser = argparse.ArgumentParser(description="Play one game between two AIs.")
+    parser.add_argument("p1_ai1")
+    parser.add_argument("p2_ai2")
+    parser.add_argument("--dimension", type=int, default=4)
+    parser.add_argument("--compact", action="store_true",
+                        help="send only the last move instead of the board (see othello_protocol)")
+    parser.add_argument("--in-process", action="store_true",
+                        help="load the AIs into this process instead of running them as "
+                        "subprocesses")
+    args = parser.parse_args()
+    if args.in_process:
+        player1 = InProcessPlayer(args.p1_ai1,1)
+        player2 = InProcessPlayer(args.p2_ai2,2)
     else:
-        player1 = AiPlayerInterface(sys.argv[1],1)
-        player2 = AiPlayerInterface(sys.argv[2],2)
-        game = OthelloGameManager(dimension=4)
-        play_game(game, player1, player2)
+        player1 = AiPlayerInterface(args.p1_ai1,1,args.compact)
+        player2 = AiPlayerInterface(args.p2_ai2,2,args.compact)
+    game = OthelloGameManager(dimension=args.dimension)
+    play_game(game, player1, player2)
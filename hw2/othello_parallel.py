@@ -0,0 +1,223 @@
+"""
+COMS W4701 Artificial Intelligence - Programming Homework 2
+
+Lazy SMP helpers for the Othello search.
+
+Threads do not help a pure Python search, so the helpers are processes.
+They share one transposition table, whose array of 64-bit integers lives in
+a multiprocessing.shared_memory block; the table's key-xor-data entries make
+torn writes from concurrent processes harmless. For every move the main
+search hands the position to each helper, which runs its own iterative
+deepening search on it (starting at staggered depths, so that the processes
+drift apart) until the main search is done. The helpers only contribute
+through the table: the main search finds their results there and cuts off
+or orders its moves with them.
+
+The command line measures how the depth reached and the nodes searched per
+second scale with the number of helpers, on random positions.
+
+Usage: python othello_parallel.py [--workers 0,1,2,4] [--dimension 8]
+           [--positions 3] [--empties 40] [--seconds 5] [--seed 0]
+
+@author: Yu Liu (yl3957)
+"""
+
+import argparse
+import multiprocessing
+import queue
+import random
+import time
+from multiprocessing import shared_memory
+
+from othello_bitboard import make_bitboard
+from othello_transposition import TranspositionTable
+
+
+def attach_table(name, size_bits):
+    """
+    Returns (memory, table) for the shared table in the block with the given
+    name, or a new block if name is None.
+    """
+    if name is None:
+        memory = shared_memory.SharedMemory(create=True, size=8 * 4 * (1 << size_bits))
+    else:
+        memory = shared_memory.SharedMemory(name=name)
+    return memory, TranspositionTable(size_bits, memory.buf.cast("q"))
+
+
+def release_table(memory, table):
+    table.table.release()
+    memory.close()
+
+
+def helper_main(name, size_bits, make_engine, jobs, results, stop):
+    """
+    Runs in a helper process: searches every job from the jobs queue until
+    stop is set, and puts (generation, nodes, depth, seconds) on the results
+    queue.
+    """
+    memory, table = attach_table(name, size_bits)
+    engine = make_engine(table=table)
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        dark, light, dimension, color, generation, first_depth = job
+        # select_move starts a new generation, which must be the one the
+        # main search is in.
+        table.generation = (generation - 2) % 63 + 1
+        engine.first_depth = first_depth
+        start = time.time()
+        engine.select_move(make_bitboard(dark, light, dimension), color, stop)
+        results.put((generation, engine.nodes, engine.depth, time.time() - start))
+    engine = None
+    release_table(memory, table)
+
+
+class HelperPool(object):
+    """
+    A number of helper processes sharing the transposition table self.table
+    with the main search. make_engine(table=table) must return a search
+    engine with the interface of yl3957_ai.AlphaBetaSearch. Each helper has
+    its own job and result queues, so one that dies cannot block the others;
+    it is dropped from the pool, and a helper that does not report back in
+    time is left out of that move's results.
+    """
+
+    # Seconds to wait for the helpers' results once they are told to stop.
+    FINISH_TIMEOUT = 1.0
+
+    def __init__(self, workers, make_engine, size_bits=18):
+        self.memory, self.table = attach_table(None, size_bits)
+        self.stop = multiprocessing.Event()
+        self.jobs = []
+        self.results = []
+        self.processes = []
+        self.generation = None
+        for _ in range(workers):
+            jobs = multiprocessing.Queue()
+            results = multiprocessing.Queue()
+            process = multiprocessing.Process(
+                target=helper_main, args=(self.memory.name, size_bits, make_engine, jobs,
+                                          results, self.stop))
+            process.daemon = True
+            process.start()
+            self.jobs.append(jobs)
+            self.results.append(results)
+            self.processes.append(process)
+
+    def start(self, board, color, generation):
+        """
+        Starts all helpers on the BitBoard board, with color to move, for a
+        main search in the given table generation.
+        """
+        self.stop.clear()
+        self.generation = generation
+        self.drop_dead()
+        for index, jobs in enumerate(self.jobs):
+            jobs.put((board.dark, board.light, board.dimension, color, generation,
+                      2 + index % 3))
+
+    def finish(self):
+        """
+        Stops the helpers and returns the (nodes, depth, seconds) of those that
+        report back within FINISH_TIMEOUT seconds; the main search's result
+        stands on its own, so missing helpers only go unreported.
+        """
+        self.stop.set()
+        deadline = time.time() + HelperPool.FINISH_TIMEOUT
+        reports = []
+        for index in range(len(self.processes)):
+            report = self.collect(index, deadline)
+            if report is not None:
+                reports.append(report)
+        self.drop_dead()
+        return reports
+
+    def collect(self, index, deadline):
+        """
+        Returns the (nodes, depth, seconds) of helper index for the current
+        generation, or None if it dies or the deadline passes first.
+        """
+        while True:
+            try:
+                generation, nodes, depth, seconds = self.results[index].get(timeout=0.05)
+            except queue.Empty:
+                if time.time() > deadline or not self.processes[index].is_alive():
+                    return None
+                continue
+            # A late result from an earlier move is discarded.
+            if generation == self.generation:
+                return nodes, depth, seconds
+
+    def drop_dead(self):
+        alive = [index for index, process in enumerate(self.processes) if process.is_alive()]
+        self.jobs = [self.jobs[index] for index in alive]
+        self.results = [self.results[index] for index in alive]
+        self.processes = [self.processes[index] for index in alive]
+
+    def close(self):
+        if self.memory is None:
+            return
+        self.drop_dead()
+        for jobs in self.jobs:
+            jobs.put(None)
+        for process in self.processes:
+            process.join(HelperPool.FINISH_TIMEOUT)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        release_table(self.memory, self.table)
+        self.memory.unlink()
+        self.memory = None
+
+
+def main():
+    # Imported here because yl3957_ai itself imports this module.
+    import yl3957_ai
+    from othello_endgame import random_position
+
+    parser = argparse.ArgumentParser(description="Measure how the parallel search scales.")
+    parser.add_argument("--workers", default="0,1,2,4", help="numbers of helper processes")
+    parser.add_argument("--dimension", type=int, default=8)
+    parser.add_argument("--positions", type=int, default=3)
+    parser.add_argument("--empties", type=int, default=40)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    positions = []
+    while len(positions) < args.positions:
+        position = random_position(rng, args.dimension, args.empties)
+        if position is not None:
+            positions.append(position)
+    print("{:>7} {:>10} {:>12} {:>8}".format("workers", "depth", "nodes/s", "speedup"))
+    baseline = None
+    for workers in [int(workers) for workers in args.workers.split(",")]:
+        if workers:
+            engine = yl3957_ai.ParallelSearch(workers, time_limit=args.seconds, log=None,
+                                              endgame_empties=None)
+        else:
+            engine = yl3957_ai.AlphaBetaSearch(time_limit=args.seconds, log=None,
+                                               endgame_empties=None)
+        depths = 0
+        nodes = 0
+        elapsed = 0.0
+        for board, color in positions:
+            engine.table.clear()
+            start = time.time()
+            engine.select_move(board, color)
+            elapsed = elapsed + time.time() - start
+            depths = depths + engine.depth
+            nodes = nodes + getattr(engine, "total_nodes", engine.nodes)
+        if workers:
+            engine.close()
+        rate = nodes / max(elapsed, 1e-9)
+        baseline = baseline or rate
+        print("{:>7} {:>10.2f} {:>12.0f} {:>7.2f}x".format(
+            workers, depths / len(positions), rate, rate / baseline))
+
+
+if __name__ == "__main__":
+    main()
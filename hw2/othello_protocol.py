@@ -0,0 +1,117 @@
+"""
+COMS W4701 Artificial Intelligence - Programming Homework 2
+
+Messages between the game manager and the AI processes, and a strict parser
+for them that replaces eval().
+
+The manager sends one of two protocols, line by line:
+
+    SCORE <dark> <light>        followed by the board as a Python literal
+                                (a list or tuple of rows of 0, 1 and 2).
+                                This is the original protocol.
+
+    BOARD <n> <cells>           the whole board, as n * n digits 0, 1 and 2
+                                in row-major order. Sent on a player's first
+                                turn in compact mode.
+    MOVE <i> <j>                the opponent's last move (column i, row j).
+                                Sent on every later turn in compact mode; the
+                                AI keeps its own board and plays its own
+                                moves and this one on it.
+
+    FINAL <dark> <light>        the game is over.
+
+The AI answers every turn with "<i> <j>".
+
+@author: Yu Liu (yl3957)
+"""
+
+import re
+
+from othello_shared import play_move
+
+ROW = r"[\[(]\s*[012](?:\s*,\s*[012])*\s*,?\s*[\])]"
+BOARD_LITERAL = re.compile(r"[\[(]\s*{0}(?:\s*,\s*{0})*\s*,?\s*[\])]".format(ROW))
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+def format_board(board):
+    return "BOARD {} {}".format(len(board), "".join(str(cell) for row in board for cell in row))
+
+
+def format_move(i, j):
+    return "MOVE {} {}".format(i, j)
+
+
+def check_square(rows):
+    if any(len(row) != len(rows) for row in rows):
+        raise ProtocolError("Board is not square.")
+
+
+def parse_board_literal(line):
+    """
+    Parses a board sent as a Python literal, e.g. "[[0, 1], [2, 0]]", into a
+    tuple of tuples. Anything but nested lists or tuples of 0, 1 and 2 is
+    rejected.
+    """
+    text = line.strip()
+    if not BOARD_LITERAL.fullmatch(text):
+        raise ProtocolError("Malformed board: {!r}".format(line))
+    rows = tuple(tuple(int(cell) for cell in re.findall(r"[012]", row))
+                 for row in re.findall(ROW, text[1:-1]))
+    check_square(rows)
+    return rows
+
+
+def parse_int(token, high=None):
+    if not token.isdigit() or (high is not None and int(token) > high):
+        raise ProtocolError("Bad number: {!r}".format(token))
+    return int(token)
+
+
+def parse_message(line):
+    """
+    Parses one message line into (kind, value): ("SCORE", (dark, light)),
+    ("FINAL", (dark, light)), ("BOARD", board) or ("MOVE", (i, j)). The board
+    literal that follows a SCORE line is not read here.
+    """
+    fields = line.split()
+    if not fields:
+        raise ProtocolError("Empty message.")
+    kind = fields[0]
+    if kind in ("SCORE", "FINAL", "MOVE") and len(fields) == 3:
+        return kind, (parse_int(fields[1]), parse_int(fields[2]))
+    if kind == "BOARD" and len(fields) == 3:
+        n = parse_int(fields[1], 255)
+        cells = fields[2]
+        if len(cells) != n * n or cells.strip("012"):
+            raise ProtocolError("Malformed board: {!r}".format(line))
+        return kind, tuple(tuple(int(cell) for cell in cells[j * n:(j + 1) * n])
+                           for j in range(n))
+    raise ProtocolError("Unknown message: {!r}".format(line))
+
+
+def read_turn(read_line, board, color):
+    """
+    Reads the manager's messages for the next turn of the player color, whose
+    board so far is board (None before the first turn). Returns (board,
+    final): the board to move on, or the last board and the final score as
+    (dark, light) when the game is over.
+    """
+    kind, value = parse_message(read_line())
+    if kind == "FINAL":
+        return board, value
+    if kind == "SCORE":
+        return parse_board_literal(read_line()), None
+    if kind == "BOARD":
+        return value, None
+    if board is None:
+        raise ProtocolError("MOVE before BOARD.")
+    i, j = value
+    n = len(board)
+    if not (i < n and j < n):
+        raise ProtocolError("Move off the board: {} {}".format(i, j))
+    opponent = 1 if color == 2 else 2
+    return play_move(board, opponent, i, j), None
@@ -0,0 +1,202 @@
+"""
+COMS W4701 Artificial Intelligence - Programming Homework 2
+
+Game records for Othello.
+
+A record file starts with the magic bytes OGR1 and the list of player
+names: their number (one byte), then each name as its length in bytes (one
+byte) followed by the name in UTF-8. The games follow, each as a 9-byte
+head and one byte per move. The head holds the board dimension, the indices
+of the dark and the light player, the final dark and light disk counts, the
+forfeiting color (0 if the game was played to the end), the reason code of
+the forfeit (an index into REASONS), the number of moves made before the
+players took over (random opening moves of the self-play generator) and the
+number of moves. Each move is its square j * n + i on the board, where i is
+the column and j the row. Since the game ends as soon as the player to move
+has no legal move, the colors alternate and the moves determine the whole
+game.
+
+Files are read one game at a time, so they can be larger than memory.
+replay() plays a record back in an OthelloGameManager.
+
+The command line prints the games of a record file and totals per pair of
+players, and with --check replays every game and compares the final disk
+counts with the record.
+
+Usage: python othello_records.py FILE [--limit 10] [--check]
+
+@author: Yu Liu (yl3957)
+"""
+
+import argparse
+import struct
+from collections import namedtuple
+
+from othello_game import OthelloGameManager
+from othello_shared import get_score
+
+MAGIC = b"OGR1"
+RECORD_HEAD = struct.Struct("<BBBBBBBBB")
+
+# Reasons for a forfeit, as in othello_game.play_game; the code is the index.
+REASONS = [None, "timeout", "invalid move"]
+
+# dark and light are player names, moves a bytes object of squares.
+GameRecord = namedtuple("GameRecord", ["dimension", "dark", "light", "dark_score",
+                                       "light_score", "forfeit", "reason", "opening",
+                                       "moves"])
+
+
+def make_record(game, dark, light, result=None, opening=0):
+    """
+    Returns the GameRecord of the game played in the OthelloGameManager game
+    between the players named dark and light. result is the dictionary
+    returned by play_game, if the game was played through it.
+    """
+    n = game.dimension
+    dark_score, light_score = get_score(game.board)
+    forfeit = 0 if result is None or result["forfeit"] is None else result["forfeit"]
+    reason = None if result is None else result["reason"]
+    return GameRecord(n, dark, light, dark_score, light_score, forfeit, reason, opening,
+                      bytes(j * n + i for i, j in game.moves))
+
+
+class RecordWriter(object):
+    """
+    Writes GameRecords between the given players to a file. The file is
+    flushed every flush_every games and when the writer is closed.
+    """
+
+    def __init__(self, filename, players, flush_every=1000):
+        self.players = list(players)
+        self.index = dict((name, index) for index, name in enumerate(self.players))
+        self.flush_every = flush_every
+        self.count = 0
+        self.file = open(filename, "wb")
+        header = [MAGIC, bytes([len(self.players)])]
+        for name in self.players:
+            encoded = name.encode("utf-8")
+            header.append(bytes([len(encoded)]) + encoded)
+        self.file.write(b"".join(header))
+
+    def write(self, record):
+        head = RECORD_HEAD.pack(record.dimension, self.index[record.dark],
+                                self.index[record.light], record.dark_score,
+                                record.light_score, record.forfeit,
+                                REASONS.index(record.reason), record.opening,
+                                len(record.moves))
+        self.file.write(head + record.moves)
+        self.count = self.count + 1
+        if self.count % self.flush_every == 0:
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_exactly(f, size, filename):
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("{} is truncated.".format(filename))
+    return data
+
+
+def read_records(filename):
+    """
+    Yields the GameRecords of a record file one by one.
+    """
+    with open(filename, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("{} is not a game record file.".format(filename))
+        players = []
+        for _ in range(read_exactly(f, 1, filename)[0]):
+            length = read_exactly(f, 1, filename)[0]
+            players.append(read_exactly(f, length, filename).decode("utf-8"))
+        while True:
+            head = f.read(RECORD_HEAD.size)
+            if not head:
+                break
+            if len(head) != RECORD_HEAD.size:
+                raise ValueError("{} is truncated.".format(filename))
+            n, dark, light, dark_score, light_score, forfeit, reason, opening, count = \
+                RECORD_HEAD.unpack(head)
+            moves = read_exactly(f, count, filename)
+            yield GameRecord(n, players[dark], players[light], dark_score, light_score,
+                             forfeit, REASONS[reason], opening, moves)
+
+
+def get_winner(record):
+    """
+    Returns the winning color of the recorded game, 0 for a draw.
+    """
+    if record.forfeit:
+        return 1 if record.forfeit == 2 else 2
+    if record.dark_score != record.light_score:
+        return 1 if record.dark_score > record.light_score else 2
+    return 0
+
+
+def replay(record):
+    """
+    Plays the record back in a new OthelloGameManager. Yields the manager
+    and the move (i, j) about to be played before every move, and finally
+    the manager and None at the end. The manager is the same object
+    throughout; copy its board to keep a position. Raises InvalidMoveError
+    on an illegal move and ValueError if a game that was not forfeited does
+    not end where the record does.
+    """
+    n = record.dimension
+    game = OthelloGameManager(n)
+    for square in record.moves:
+        move = (square % n, square // n)
+        yield game, move
+        game.play(*move)
+    if not record.forfeit and game.get_possible_moves():
+        raise ValueError("The game continues after the recorded moves.")
+    yield game, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the games of an Othello record file.")
+    parser.add_argument("file")
+    parser.add_argument("--limit", type=int, default=10, help="number of games to print")
+    parser.add_argument("--check", action="store_true",
+                        help="replay every game and compare the final disk counts")
+    args = parser.parse_args()
+
+    totals = {}
+    moves = 0
+    count = 0
+    for record in read_records(args.file):
+        count = count + 1
+        moves = moves + len(record.moves)
+        if count <= args.limit:
+            print("{} {}:{} {} ({} moves{}{})".format(
+                record.dark, record.dark_score, record.light_score, record.light,
+                len(record.moves),
+                ", {} random".format(record.opening) if record.opening else "",
+                "" if record.reason is None else ", {}".format(record.reason)))
+        if args.check:
+            for game, move in replay(record):
+                pass
+            if get_score(game.board) != (record.dark_score, record.light_score):
+                raise ValueError("game {} does not replay to its final score".format(count))
+        # Wins, draws and losses of the dark player.
+        total = totals.setdefault((record.dark, record.light), [0, 0, 0])
+        outcome = [1, 0, 2][get_winner(record)]
+        total[outcome] = total[outcome] + 1
+    print("{} games, {:.1f} moves per game{}".format(
+        count, moves / max(count, 1), ", all replayed" if args.check else ""))
+    for (dark, light), (wins, draws, losses) in sorted(totals.items()):
+        print("{} (dark) vs {} (light): {} wins, {} draws, {} losses".format(
+            dark, light, wins, draws, losses))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+COMS W4701 Artificial Intelligence - Programming Homework 2
+
+Self-play game generator for Othello.
+
+Plays games between in-process AIs (see othello_game.InProcessPlayer) on a
+process pool and streams them to a game record file (see othello_records),
+to collect training data for the evaluation weights. A player is given as
+an AI script, optionally followed by a colon and comma-separated settings
+of the script's module-level names, for example
+
+    randy_ai.py
+    yl3957_ai.py:DEPTH_LIMIT=2,USE_BOOK=False,ENDGAME_EMPTIES=None
+
+Games cycle through every ordered pair of players, including each player
+against itself. Each game starts with a number of uniformly random moves,
+so that deterministic players do not repeat the same game; the random
+number generators of every game are seeded from --seed and the game
+number. Each worker process loads every player once and keeps it for all
+its games. Games are handed to the pool in batches, so the number of games
+is not limited by memory, and the record file is flushed periodically, so
+an interrupted run keeps most of its games.
+
+Usage: python othello_selfplay.py PLAYER [PLAYER ...] -o FILE
+           [--games 1000] [--dimension 8] [--random-moves 6]
+           [--time-limit SECONDS] [--processes N] [--flush-every 1000]
+           [--seed 0]
+
+@author: Yu Liu (yl3957)
+"""
+
+import argparse
+import ast
+import os
+import random
+import sys
+import time
+from functools import partial
+from multiprocessing import Pool
+
+from othello_game import InProcessPlayer, OthelloGameManager, play_game
+from othello_records import RecordWriter, make_record
+
+# Games handed to the pool at a time.
+BATCH_SIZE = 1000
+
+# Players loaded in this worker process, by (player, color).
+PLAYERS = {}
+
+
+def parse_player(player):
+    """
+    Returns (filename, options) for a player given as FILE[:NAME=VALUE,...].
+    Values are Python literals; anything else is taken as a string.
+    """
+    filename, _, settings = player.partition(":")
+    options = {}
+    for setting in settings.split(",") if settings else []:
+        name, _, value = setting.partition("=")
+        try:
+            options[name.strip()] = ast.literal_eval(value.strip())
+        except (ValueError, SyntaxError):
+            options[name.strip()] = value.strip()
+    return filename, options
+
+
+def init_worker():
+    # The players keep their log stream for all games, so the AIs' progress
+    # reports are silenced for the worker's lifetime.
+    sys.stderr = open(os.devnull, "w")
+
+
+def get_player(player, color, time_limit):
+    key = (player, color)
+    if key not in PLAYERS:
+        filename, options = parse_player(player)
+        PLAYERS[key] = InProcessPlayer(filename, color, time_limit, options)
+    instance = PLAYERS[key]
+    instance.name = player
+    instance.move_times = []
+    return instance
+
+
+def play_record(task, players, time_limit):
+    """
+    Plays one game in a pool worker and returns its GameRecord.
+    """
+    number, dark, light, dimension, random_moves, seed = task
+    rng = random.Random(seed * 1000003 + number)
+    # Randy draws its moves from the global generator.
+    random.seed(rng.random())
+    game = OthelloGameManager(dimension)
+    opening = 0
+    while opening < random_moves:
+        moves = game.get_possible_moves()
+        if not moves:
+            break
+        game.play(*rng.choice(moves))
+        opening = opening + 1
+    player1 = get_player(players[dark], 1, time_limit)
+    player2 = get_player(players[light], 2, time_limit)
+    result = play_game(game, player1, player2, verbose=False)
+    return make_record(game, players[dark], players[light], result, opening)
+
+
+def make_tasks(players, games, dimension, random_moves, seed):
+    """
+    Yields one task per game: (game number, dark player index, light player
+    index, dimension, random moves, seed).
+    """
+    pairings = [(dark, light) for dark in range(len(players)) for light in range(len(players))]
+    for number in range(games):
+        dark, light = pairings[number % len(pairings)]
+        yield (number, dark, light, dimension, random_moves, seed)
+
+
+def generate(players, filename, games, dimension=8, random_moves=6, time_limit=None,
+             processes=None, flush_every=1000, seed=0, log=sys.stderr):
+    """
+    Plays the games and writes their records to filename in the order they
+    finish. Returns the number of games written.
+    """
+    tasks = make_tasks(players, games, dimension, random_moves, seed)
+    start = time.time()
+    pool = Pool(processes, init_worker)
+    try:
+        with RecordWriter(filename, players, flush_every) as writer:
+            while writer.count < games:
+                batch = [task for _, task in zip(range(BATCH_SIZE), tasks)]
+                for record in pool.imap_unordered(
+                        partial(play_record, players=players, time_limit=time_limit), batch):
+                    writer.write(record)
+                    if log is not None and writer.count % flush_every == 0:
+                        elapsed = time.time() - start
+                        log.write("{} games in {:.0f}s, {:.1f} games/s\n".format(
+                            writer.count, elapsed, writer.count / max(elapsed, 1e-9)))
+                        log.flush()
+            count = writer.count
+    finally:
+        pool.close()
+        pool.join()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record self-play games between Othello AIs.")
+    parser.add_argument("players", nargs="+", help="AI scripts, as FILE[:NAME=VALUE,...]")
+    parser.add_argument("-o", "--output", required=True, help="game record file")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--dimension", type=int, default=8)
+    parser.add_argument("--random-moves", type=int, default=6,
+                        help="random moves at the start of every game")
+    parser.add_argument("--time-limit", type=float, default=None,
+                        help="CPU seconds per move (default: the game manager's timeout)")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--flush-every", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if len(args.players) > 255:
+        parser.error("at most 255 players")
+
+    start = time.time()
+    count = generate(args.players, args.output, args.games, args.dimension, args.random_moves,
+                     args.time_limit, args.processes, args.flush_every, args.seed)
+    print("{} games written to {} in {:.1f}s".format(count, args.output, time.time() - start))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+COMS W4701 Artificial Intelligence - Programming Homework 2
+
+The 8 symmetries of the Othello board (rotations and reflections) and
+canonical forms of positions under them.
+
+A symmetry is an index into the list of transforms; transform 0 is the
+identity. get_symmetries gives for every transform the permutation of the
+squares and its inverse, which map moves into and out of a transformed
+frame.
+
+Two canonical forms are used. canonical() reduces a position given as the
+disks of the player to move and of the opponent by all 8 symmetries, which
+also merges positions that differ only in which color is to move; the
+opening book is keyed by it. canonical_key() reduces the Zobrist hash of a
+BitBoard by a group of color-preserving symmetries, usually the symmetries
+of the root of a search (see root_symmetries): positions in the search that
+are mirror images of each other then share transposition table entries.
+Both are cheap while few disks are on the board, which is when positions
+have symmetries at all.
+
+The command line compares the transposition table hit rate and node count
+of fixed-depth searches from the initial position with and without the
+canonical keys.
+
+Usage: python othello_symmetry.py [--dimension 8] [--depth 6]
+
+@author: Yu Liu (yl3957)
+"""
+
+import argparse
+
+from othello_bitboard import get_zobrist, squares
+
+# Square permutations of the 8 symmetries per board dimension.
+SYMMETRIES = {}
+
+
+def get_symmetries(dimension):
+    """
+    Returns (forward, inverse): for each of the 8 rotations and reflections
+    a list mapping every square to its image, and the list of the inverse
+    mappings.
+    """
+    symmetries = SYMMETRIES.get(dimension)
+    if symmetries is None:
+        n = dimension
+        last = n - 1
+        transforms = [lambda i, j: (i, j), lambda i, j: (last - i, j),
+                      lambda i, j: (i, last - j), lambda i, j: (last - i, last - j),
+                      lambda i, j: (j, i), lambda i, j: (last - j, i),
+                      lambda i, j: (j, last - i), lambda i, j: (last - j, last - i)]
+        forward = []
+        inverse = []
+        for transform in transforms:
+            mapping = [0] * (n * n)
+            for j in range(n):
+                for i in range(n):
+                    ti, tj = transform(i, j)
+                    mapping[j * n + i] = tj * n + ti
+            back = [0] * (n * n)
+            for square, image in enumerate(mapping):
+                back[image] = square
+            forward.append(mapping)
+            inverse.append(back)
+        symmetries = (forward, inverse)
+        SYMMETRIES[dimension] = symmetries
+    return symmetries
+
+
+def transform_bits(bits, mapping):
+    result = 0
+    for square in squares(bits):
+        result = result | (1 << mapping[square])
+    return result
+
+
+def to_canonical_square(square, symmetry, dimension):
+    return get_symmetries(dimension)[0][symmetry][square]
+
+
+def from_canonical_square(square, symmetry, dimension):
+    return get_symmetries(dimension)[1][symmetry][square]
+
+
+def canonical(own, opponent, dimension):
+    """
+    Returns (own, opponent, symmetry): the canonical form of the position
+    with the given disks of the player to move and of the opponent, and the
+    symmetry that maps the position onto it.
+    """
+    forward = get_symmetries(dimension)[0]
+    size = dimension * dimension
+    best = None
+    for index, mapping in enumerate(forward):
+        candidate = (transform_bits(own, mapping), transform_bits(opponent, mapping))
+        if best is None or (candidate[0] << size | candidate[1]) < (best[0] << size | best[1]):
+            best = candidate
+            symmetry = index
+    return best[0], best[1], symmetry
+
+
+def root_symmetries(bitboard):
+    """
+    Returns the symmetries other than the identity that map the BitBoard onto
+    itself, colors included. Together with the identity they form a group.
+    """
+    forward = get_symmetries(bitboard.dimension)[0]
+    return [index for index in range(1, len(forward))
+            if transform_bits(bitboard.dark, forward[index]) == bitboard.dark
+            and transform_bits(bitboard.light, forward[index]) == bitboard.light]
+
+
+def canonical_key(bitboard, player, symmetries):
+    """
+    Returns (key, symmetry): the smallest Zobrist hash (with player to move)
+    of the BitBoard's images under the identity and the given group of
+    symmetries, and the symmetry that gives it.
+    """
+    dark_keys, light_keys, flip_keys, side_key = get_zobrist(bitboard.dimension)
+    forward = get_symmetries(bitboard.dimension)[0]
+    side = side_key if player == 2 else 0
+    best = bitboard.key ^ side
+    best_symmetry = 0
+    dark = squares(bitboard.dark)
+    light = squares(bitboard.light)
+    for symmetry in symmetries:
+        mapping = forward[symmetry]
+        key = side
+        for square in dark:
+            key = key ^ dark_keys[mapping[square]]
+        for square in light:
+            key = key ^ light_keys[mapping[square]]
+        if key < best:
+            best = key
+            best_symmetry = symmetry
+    return best, best_symmetry
+
+
+def main():
+    # Imported here because yl3957_ai itself imports this module.
+    import yl3957_ai
+    from othello_bitboard import to_bitboard
+    from othello_game import OthelloGameManager
+
+    parser = argparse.ArgumentParser(description="Measure the effect of canonical search keys.")
+    parser.add_argument("--dimension", type=int, default=8)
+    parser.add_argument("--depth", type=int, default=6)
+    args = parser.parse_args()
+
+    board = to_bitboard(OthelloGameManager(args.dimension).create_initial_board())
+    print("{} symmetries of the initial position".format(len(root_symmetries(board)) + 1))
+    for use_symmetry in (False, True):
+        engine = yl3957_ai.AlphaBetaSearch(time_limit=None, depth_limit=args.depth, log=None)
+        engine.use_symmetry = use_symmetry
+        engine.select_move(board, 1)
+        print("{:<18} {:>8} nodes, {:.1%} table hits".format(
+            "canonical keys" if use_symmetry else "plain keys", engine.nodes,
+            engine.table.hit_rate()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+COMS W4701 Artificial Intelligence - Programming Homework 2
+
+Headless tournament runner for Othello AIs.
+
+Every pairing of AI scripts (all pairs for a round robin, the first script
+against each of the others for a gauntlet) plays a number of games, with
+the colors swapped every other game. The games run concurrently on a process
+pool, each game starting its own two AI processes through the game manager
+in othello_game, or with --async all in one asyncio event loop through the
+manager in othello_async. The results are printed as a win/draw/loss table
+with Elo ratings estimated from all games, and written as JSON together with
+every game and the per-move think times of each AI.
+
+Usage: python othello_tournament.py AI.py AI.py [AI.py ...] [--gauntlet]
+           [--games 2] [--dimension 6] [--no-swap] [--mode MODE]
+           [--processes N | --async [GAMES]] [-o RESULTS.json]
+
+@author: Yu Liu (yl3957)
+"""
+
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+from contextlib import redirect_stderr
+from functools import partial
+from multiprocessing import Pool
+
+from othello_async import run_tasks
+from othello_game import AiPlayerInterface, InProcessPlayer, OthelloGameManager, play_game
+
+
+def make_pairings(scripts, gauntlet=False):
+    """
+    Returns the list of (index, index) pairs of scripts that play each other.
+    """
+    if gauntlet:
+        return [(0, other) for other in range(1, len(scripts))]
+    return [(first, second) for first in range(len(scripts))
+            for second in range(first + 1, len(scripts))]
+
+
+# How the AIs are run: as subprocesses with the original or the compact
+# protocol (see othello_protocol), or loaded into the worker process.
+MODES = ["pipe", "compact", "in-process"]
+
+
+def make_tasks(pairings, games, dimension, swap=True, mode="pipe"):
+    """
+    Returns one task per game: (game number, dark script index, light script
+    index, dimension, mode).
+    """
+    tasks = []
+    for first, second in pairings:
+        for game in range(games):
+            if swap and game % 2 == 1:
+                dark, light = second, first
+            else:
+                dark, light = first, second
+            tasks.append((len(tasks), dark, light, dimension, mode))
+    return tasks
+
+
+def run_game(task, scripts):
+    """
+    Plays one game in a pool worker and returns its record.
+    """
+    number, dark, light, dimension, mode = task
+    start = time.time()
+    if mode == "in-process":
+        with open(os.devnull, "w") as devnull, redirect_stderr(devnull):
+            player1 = InProcessPlayer(scripts[dark], 1)
+            player2 = InProcessPlayer(scripts[light], 2)
+            result = play_game(OthelloGameManager(dimension), player1, player2, verbose=False)
+    else:
+        compact = mode == "compact"
+        game = OthelloGameManager(dimension)
+        started = []
+        try:
+            player1 = AiPlayerInterface(scripts[dark], 1, compact, verbose=False,
+                                        stderr=subprocess.DEVNULL)
+            started.append(player1)
+            player2 = AiPlayerInterface(scripts[light], 2, compact, verbose=False,
+                                        stderr=subprocess.DEVNULL)
+            started.append(player2)
+            result = play_game(game, player1, player2, verbose=False)
+        finally:
+            # play_game kills the players when the game ends; this also
+            # covers a player that failed to start or an unexpected error.
+            for player in started:
+                player.kill(game)
+    result["game"] = number
+    result["dark_script"] = dark
+    result["light_script"] = light
+    result["dark_times"] = player1.move_times
+    result["light_times"] = player2.move_times
+    result["seconds"] = time.time() - start
+    return result
+
+
+def outcomes(results):
+    """
+    Yields (script, opponent, points) for both sides of every game, where
+    points is 1 for a win, 0.5 for a draw and 0 for a loss.
+    """
+    for result in results:
+        dark, light = result["dark_script"], result["light_script"]
+        points = {1: 1.0, 2: 0.0, 0: 0.5}[result["winner"]]
+        yield dark, light, points
+        yield light, dark, 1.0 - points
+
+
+def estimate_elo(count, results, iterations=1000, tolerance=1e-9):
+    """
+    Estimates Elo ratings for count players with the Bradley-Terry model,
+    fitted with the minorization-maximization updates of Hunter (2004). A
+    draw counts as half a win for each side, and every pair of players that
+    met gets one extra virtual draw, so that players who won or lost all
+    their games still get finite ratings. The ratings have mean 0.
+    """
+    wins = [0.0] * count
+    games = {}
+    for player, opponent, points in outcomes(results):
+        wins[player] = wins[player] + points
+        games[(player, opponent)] = games.get((player, opponent), 0) + 1
+    for player, opponent in games:
+        wins[player] = wins[player] + 0.5
+        games[(player, opponent)] = games[(player, opponent)] + 1
+    strength = [1.0] * count
+    for _ in range(iterations):
+        updated = []
+        for player in range(count):
+            denominator = sum(number / (strength[player] + strength[opponent])
+                              for (first, opponent), number in games.items() if first == player)
+            updated.append(wins[player] / denominator if denominator else strength[player])
+        scale = math.exp(sum(math.log(value) for value in updated) / count)
+        updated = [value / scale for value in updated]
+        change = max(abs(new - old) for new, old in zip(updated, strength))
+        strength = updated
+        if change < tolerance:
+            break
+    return [400.0 * math.log10(value) for value in strength]
+
+
+def time_statistics(times):
+    if not times:
+        return {"moves": 0}
+    ordered = sorted(times)
+    return {"moves": len(ordered),
+            "mean": sum(ordered) / len(ordered),
+            "median": ordered[len(ordered) // 2],
+            "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+            "max": ordered[-1],
+            "total": sum(ordered)}
+
+
+def summarize(scripts, results):
+    """
+    Returns the standings: for every script its wins, draws, losses, score,
+    forfeits, Elo estimate, think-time statistics and results per opponent.
+    """
+    elo = estimate_elo(len(scripts), results)
+    players = []
+    for index, script in enumerate(scripts):
+        players.append({"script": script, "wins": 0, "draws": 0, "losses": 0, "score": 0.0,
+                        "forfeits": 0, "elo": elo[index], "opponents": {}})
+    for player, opponent, points in outcomes(results):
+        record = players[player]
+        key = "wins" if points == 1.0 else "draws" if points == 0.5 else "losses"
+        record[key] = record[key] + 1
+        record["score"] = record["score"] + points
+        against = record["opponents"].setdefault(scripts[opponent],
+                                                 {"wins": 0, "draws": 0, "losses": 0})
+        against[key] = against[key] + 1
+    times = [[] for _ in scripts]
+    for result in results:
+        times[result["dark_script"]].extend(result["dark_times"])
+        times[result["light_script"]].extend(result["light_times"])
+        if result["forfeit"] is not None:
+            loser = result["dark_script"] if result["forfeit"] == 1 else result["light_script"]
+            players[loser]["forfeits"] = players[loser]["forfeits"] + 1
+    for index, record in enumerate(players):
+        record["think_time"] = time_statistics(times[index])
+    return players
+
+
+def print_standings(players, out=sys.stdout):
+    out.write("{:<30} {:>4} {:>4} {:>4} {:>6} {:>7} {:>9} {:>9}\n".format(
+        "AI", "W", "D", "L", "Score", "Elo", "Mean (s)", "Max (s)"))
+    for record in sorted(players, key=lambda record: -record["elo"]):
+        think = record["think_time"]
+        out.write("{:<30} {:>4} {:>4} {:>4} {:>6.1f} {:>+7.0f} {:>9.3f} {:>9.3f}\n".format(
+            record["script"], record["wins"], record["draws"], record["losses"],
+            record["score"], record["elo"], think.get("mean", 0.0), think.get("max", 0.0)))
+
+
+def run_tournament(scripts, games=2, dimension=6, gauntlet=False, swap=True,
+                   mode="pipe", processes=None, concurrency=None, log=sys.stderr):
+    """
+    Plays all the games and returns the list of game records, in the order
+    the games were scheduled. The games run on a process pool, or, if
+    concurrency is given, up to that many at a time in one asyncio event
+    loop (see othello_async).
+    """
+    pairings = make_pairings(scripts, gauntlet)
+    tasks = make_tasks(pairings, games, dimension, swap, mode)
+    results = []
+
+    def report(result):
+        results.append(result)
+        if log is not None:
+            log.write("game {}/{}: {} {}:{} {}{}\n".format(
+                len(results), len(tasks), scripts[result["dark_script"]],
+                result["dark_score"], result["light_score"],
+                scripts[result["light_script"]],
+                "" if result["reason"] is None else " ({})".format(result["reason"])))
+            log.flush()
+
+    if concurrency is not None:
+        run_tasks(tasks, scripts, concurrency, report)
+    else:
+        pool = Pool(processes)
+        try:
+            for result in pool.imap_unordered(partial(run_game, scripts=scripts), tasks):
+                report(result)
+        finally:
+            pool.close()
+            pool.join()
+    results.sort(key=lambda result: result["game"])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a tournament between Othello AIs.")
+    parser.add_argument("scripts", nargs="+")
+    parser.add_argument("--gauntlet", action="store_true",
+                        help="play the first AI against each of the others only")
+    parser.add_argument("--games", type=int, default=2, help="games per pairing")
+    parser.add_argument("--dimension", type=int, default=6)
+    parser.add_argument("--no-swap", action="store_true",
+                        help="do not swap colors between games of a pairing")
+    parser.add_argument("--mode", choices=MODES, default="pipe",
+                        help="run the AIs as subprocesses with the original or the compact "
+                             "protocol, or load their select_move into the pool workers")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--async", dest="concurrency", type=int, nargs="?", const=64,
+                        default=None, metavar="GAMES",
+                        help="run up to GAMES games at once in one event loop instead "
+                             "of a process pool (default 64)")
+    parser.add_argument("-o", "--output", help="JSON results file")
+    args = parser.parse_args()
+    if len(args.scripts) < 2:
+        parser.error("at least two AIs are needed")
+
+    start = time.time()
+    if args.mode == "in-process" and args.concurrency is not None:
+        parser.error("in-process games run on the process pool, not with --async")
+    results = run_tournament(args.scripts, args.games, args.dimension, args.gauntlet,
+                             not args.no_swap, args.mode, args.processes, args.concurrency)
+    players = summarize(args.scripts, results)
+    print_standings(players)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": {"scripts": args.scripts, "games": args.games,
+                                  "dimension": args.dimension, "gauntlet": args.gauntlet,
+                                  "swap": not args.no_swap, "mode": args.mode,
+                                  "concurrency": args.concurrency,
+                                  "timeout": AiPlayerInterface.TIMEOUT},
+                       "seconds": time.time() - start,
+                       "players": players,
+                       "games": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
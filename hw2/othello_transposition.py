@@ -0,0 +1,98 @@
+"""
+COMS W4701 Artificial Intelligence - Programming Homework 2
+
+A transposition table for Othello search, keyed by the Zobrist hashes of
+othello_bitboard.
+
+The table is a flat array of 64-bit integers split into buckets of two
+slots. The first slot of a bucket is depth-preferred: it is only replaced by
+a search at least as deep, or by any search once its entry is from an older
+generation (an earlier move of the game). The second slot is always
+replaced. Each slot holds two integers, the entry's data and its key xor
+its data, so an entry whose two halves were not written together never
+matches a key. The table can therefore live in any array of 64-bit
+integers, including shared memory.
+
+@author: Yu Liu (yl3957)
+"""
+
+from array import array
+
+# Bound types: the stored value is exact, a lower bound (the search failed
+# high) or an upper bound (the search failed low).
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+NO_MOVE = 255
+
+# Layout of the data word, from the low bits up.
+BOUND_SHIFT = 8
+DEPTH_SHIFT = 10
+GENERATION_SHIFT = 18
+VALUE_SHIFT = 24
+VALUE_OFFSET = 1 << 31
+
+
+def pack_entry(value, bound, depth, move, generation):
+    return (((value + VALUE_OFFSET) << VALUE_SHIFT) | (generation << GENERATION_SHIFT)
+            | (depth << DEPTH_SHIFT) | (bound << BOUND_SHIFT) | move)
+
+
+class TranspositionTable(object):
+    """
+    A fixed-size table of 2**size_bits buckets. probe(key) returns
+    (value, bound, depth, move) or None; move is NO_MOVE when unknown.
+    """
+
+    def __init__(self, size_bits=18, storage=None):
+        self.buckets = 1 << size_bits
+        self.mask = self.buckets - 1
+        if storage is None:
+            storage = array("q", bytes(8 * 4 * self.buckets))
+        self.table = storage
+        self.generation = 1
+        self.probes = 0
+        self.hits = 0
+
+    def new_search(self):
+        """
+        Starts a new generation, so that entries from earlier searches no
+        longer block the depth-preferred slots.
+        """
+        self.generation = self.generation % 63 + 1
+
+    def clear(self):
+        for index in range(len(self.table)):
+            self.table[index] = 0
+
+    def probe(self, key):
+        self.probes = self.probes + 1
+        table = self.table
+        index = (key & self.mask) << 2
+        for slot in (index, index + 2):
+            data = table[slot + 1]
+            if data and table[slot] ^ data == key:
+                self.hits = self.hits + 1
+                return ((data >> VALUE_SHIFT) - VALUE_OFFSET,
+                        (data >> BOUND_SHIFT) & 3,
+                        (data >> DEPTH_SHIFT) & 0xFF,
+                        data & 0xFF)
+        return None
+
+    def store(self, key, value, bound, depth, move=NO_MOVE):
+        table = self.table
+        index = (key & self.mask) << 2
+        data = pack_entry(value, bound, depth, move, self.generation)
+        old = table[index + 1]
+        if (not old or table[index] ^ old == key
+                or (old >> GENERATION_SHIFT) & 0x3F != self.generation
+                or depth >= (old >> DEPTH_SHIFT) & 0xFF):
+            slot = index
+        else:
+            slot = index + 2
+        table[slot] = key ^ data
+        table[slot + 1] = data
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
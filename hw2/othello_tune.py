@@ -0,0 +1,253 @@
+"""
+COMS W4701 Artificial Intelligence - Programming Homework 2
+
+Fits the evaluation weights of othello_eval to recorded games.
+
+Positions are streamed from game record files (see othello_records and
+othello_selfplay): every position before a move of a game that was played
+to the end, with at least --min-empties empty squares, paired with the
+game's final result. A shuffle buffer mixes positions of different games
+before they are cut into mini-batches, so only the buffer is ever held in
+memory. The features of a mini-batch (those of othello_eval.FEATURES, for
+dark) are computed at once with NumPy from the unpacked disk bitmasks; only
+mobility needs the move generator per position.
+
+The weights are fitted by mini-batch gradient descent (Adam) over a number
+of passes through the files, either by least squares against the final disk
+differential (get_score's dark minus light count) or by logistic regression
+against the game's outcome (1 for a dark win, 1/2 for a draw, 0 for a loss),
+where a value of --scale disks is a logit of 1. Either way the fitted
+weights are in disks of final margin; they are written to the weights file
+as integers in WEIGHT_SCALE units per disk (hundredths of a disk), which
+yl3957_ai loads for the board size when it starts evaluating. The scale of
+the evaluation does not matter to the search: yl3957_ai scores final
+positions above the bound of whichever weights it evaluates with.
+
+NumPy is needed by this tuner only, not by the AI.
+
+Usage: python othello_tune.py FILE [FILE ...] [--dimension 8]
+           [--loss squares|logistic] [--epochs 3] [--batch-size 4096]
+           [--buffer 65536] [--learning-rate 0.01] [--l2 0] [--scale 10]
+           [--min-empties 13] [--seed 0] [-o WEIGHTS.json]
+
+@author: Yu Liu (yl3957)
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+import numpy as np
+
+from othello_bitboard import get_move_mask, play_square, popcount, to_bitboard
+from othello_eval import FEATURES, SQUARE_CLASSES, square_class, stable_line, weights_filename
+from othello_game import OthelloGameManager
+from othello_records import get_winner, read_records
+
+# Integer evaluation units per disk of final margin in the weights file.
+WEIGHT_SCALE = 100
+
+# Arrays for the batch feature computation per board dimension.
+FEATURE_TABLES = {}
+
+
+def get_feature_tables(dimension):
+    """
+    Returns (classes, lines, powers, stable): the matrix from squares to
+    square classes, the squares of the four edge lines, the base-3 place
+    values of a line and the stable disk difference per base-3 line code.
+    """
+    tables = FEATURE_TABLES.get(dimension)
+    if tables is None:
+        n = dimension
+        classes = np.zeros((n * n, len(SQUARE_CLASSES)))
+        for j in range(n):
+            for i in range(n):
+                classes[j * n + i, SQUARE_CLASSES.index(square_class(i, j, n))] = 1
+        lines = np.array([[k for k in range(n)],
+                          [(n - 1) * n + k for k in range(n)],
+                          [k * n for k in range(n)],
+                          [k * n + n - 1 for k in range(n)]])
+        powers = 3 ** np.arange(n)
+        stable = []
+        for code in range(3 ** n):
+            cells = []
+            for _ in range(n):
+                cells.append(code % 3)
+                code = code // 3
+            stable.append(stable_line(cells))
+        tables = (classes, lines, powers, np.array(stable))
+        FEATURE_TABLES[dimension] = tables
+    return tables
+
+
+def unpack(bitmasks, dimension):
+    """
+    Returns the bitmasks as a (len(bitmasks), dimension ** 2) array of 0/1.
+    """
+    size = dimension * dimension
+    width = (size + 7) // 8
+    data = b"".join(bits.to_bytes(width, "little") for bits in bitmasks)
+    packed = np.frombuffer(data, dtype=np.uint8).reshape(len(bitmasks), width)
+    return np.unpackbits(packed, axis=1, bitorder="little")[:, :size]
+
+
+def feature_matrix(dimension, darks, lights, mobility):
+    """
+    Returns the features of a batch of positions for dark, one row per
+    position and one column per entry of FEATURES, given the positions'
+    dark and light bitmasks and mobility (dark minus light move count).
+    """
+    classes, lines, powers, stable = get_feature_tables(dimension)
+    dark = unpack(darks, dimension).astype(np.int64)
+    light = unpack(lights, dimension).astype(np.int64)
+    signs = dark - light
+    columns = {"discs": signs.sum(axis=1), "mobility": np.asarray(mobility)}
+    by_class = signs @ classes
+    for index, name in enumerate(SQUARE_CLASSES):
+        columns[name] = by_class[:, index]
+    codes = dark[:, lines] @ powers + 2 * (light[:, lines] @ powers)
+    columns["stable_edges"] = stable[codes].sum(axis=1)
+    return np.stack([columns[name] for name in FEATURES], axis=1).astype(np.float64)
+
+
+def stream_positions(filenames, dimension, min_empties):
+    """
+    Yields (dark, light, mobility, disk differential, outcome) for every
+    position before a move of the recorded games of the given dimension
+    that were played to the end, with at least min_empties empty squares.
+    """
+    start = to_bitboard(OthelloGameManager(dimension).create_initial_board())
+    size = dimension * dimension
+    for filename in filenames:
+        for record in read_records(filename):
+            if record.dimension != dimension or record.forfeit:
+                continue
+            difference = record.dark_score - record.light_score
+            outcome = [0.5, 1.0, 0.0][get_winner(record)]
+            board = start
+            player = 1
+            for square in record.moves:
+                if size - popcount(board.dark | board.light) < min_empties:
+                    break
+                mobility = popcount(get_move_mask(board, 1)) - popcount(get_move_mask(board, 2))
+                yield board.dark, board.light, mobility, difference, outcome
+                board = play_square(board, player, square)
+                player = 1 if player == 2 else 2
+
+
+def stream_batches(positions, batch_size, buffer_size, rng):
+    """
+    Yields non-empty lists of at most batch_size positions, shuffled within a
+    buffer of buffer_size positions (at least batch_size).
+    """
+    if batch_size < 1 or buffer_size < batch_size:
+        raise ValueError("need 1 <= batch_size <= buffer_size")
+    buffer = []
+    for position in positions:
+        buffer.append(position)
+        if len(buffer) >= buffer_size:
+            rng.shuffle(buffer)
+            while len(buffer) > buffer_size - batch_size:
+                yield buffer[-batch_size:]
+                del buffer[-batch_size:]
+    rng.shuffle(buffer)
+    for offset in range(0, len(buffer), batch_size):
+        yield buffer[offset:offset + batch_size]
+
+
+def fit(filenames, dimension, loss="squares", epochs=3, batch_size=4096, buffer_size=65536,
+        learning_rate=0.01, l2=0.0, scale=10.0, min_empties=13, seed=0, log=sys.stderr):
+    """
+    Fits the weights to the recorded games and returns (weights, positions,
+    mean loss of the last pass), the weights as a dictionary from feature
+    names to floats in disks.
+    """
+    rng = random.Random(seed)
+    weights = np.zeros(len(FEATURES))
+    # Adam's moment estimates.
+    first = np.zeros(len(FEATURES))
+    second = np.zeros(len(FEATURES))
+    beta1, beta2, epsilon = 0.9, 0.999, 1e-8
+    steps = 0
+    for epoch in range(epochs):
+        started = time.time()
+        positions = 0
+        total_loss = 0.0
+        for batch in stream_batches(stream_positions(filenames, dimension, min_empties),
+                                    batch_size, buffer_size, rng):
+            darks, lights, mobility, differences, outcomes = zip(*batch)
+            x = feature_matrix(dimension, darks, lights, mobility)
+            values = x @ weights
+            if loss == "squares":
+                errors = values - np.array(differences)
+                total_loss = total_loss + float(errors @ errors)
+                gradient = 2 * x.T @ errors / len(batch)
+            else:
+                targets = np.array(outcomes)
+                p = 1 / (1 + np.exp(-values / scale))
+                p = np.clip(p, 1e-12, 1 - 1e-12)
+                total_loss = total_loss - float(np.sum(targets * np.log(p)
+                                                       + (1 - targets) * np.log(1 - p)))
+                gradient = x.T @ (p - targets) / (scale * len(batch))
+            gradient = gradient + 2 * l2 * weights
+            steps = steps + 1
+            first = beta1 * first + (1 - beta1) * gradient
+            second = beta2 * second + (1 - beta2) * gradient * gradient
+            weights = weights - (learning_rate * first / (1 - beta1 ** steps)
+                                 / (np.sqrt(second / (1 - beta2 ** steps)) + epsilon))
+            positions = positions + len(batch)
+        if not positions:
+            raise ValueError("no {}x{} positions in the record files".format(dimension, dimension))
+        mean_loss = total_loss / positions
+        if log is not None:
+            log.write("pass {}: {} positions, mean loss {:.4f}{}, {:.1f}s\n".format(
+                epoch + 1, positions, mean_loss,
+                " (rms error {:.2f} disks)".format(mean_loss ** 0.5) if loss == "squares" else "",
+                time.time() - started))
+            log.flush()
+    return dict(zip(FEATURES, weights.tolist())), positions, mean_loss
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fit Othello evaluation weights to recorded games.")
+    parser.add_argument("files", nargs="+", help="game record files")
+    parser.add_argument("--dimension", type=int, default=8)
+    parser.add_argument("--loss", choices=["squares", "logistic"], default="squares")
+    parser.add_argument("--epochs", type=int, default=3, help="passes through the files")
+    parser.add_argument("--batch-size", type=int, default=4096)
+    parser.add_argument("--buffer", type=int, default=65536, help="positions in the shuffle buffer")
+    parser.add_argument("--learning-rate", type=float, default=0.01)
+    parser.add_argument("--l2", type=float, default=0.0, help="L2 penalty on the weights")
+    parser.add_argument("--scale", type=float, default=10.0,
+                        help="disks per logit for the logistic loss")
+    # yl3957_ai solves positions with up to 12 empty squares exactly.
+    parser.add_argument("--min-empties", type=int, default=13,
+                        help="ignore positions with fewer empty squares")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="weights file (default: next to othello_eval)")
+    args = parser.parse_args()
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    if args.buffer < args.batch_size:
+        parser.error("--buffer must be at least --batch-size")
+
+    weights, positions, mean_loss = fit(
+        args.files, args.dimension, args.loss, args.epochs, args.batch_size, args.buffer,
+        args.learning_rate, args.l2, args.scale, args.min_empties, args.seed)
+    scaled = dict((name, int(round(weights[name] * WEIGHT_SCALE))) for name in FEATURES)
+    filename = args.output or weights_filename(args.dimension)
+    with open(filename, "w") as f:
+        json.dump({"dimension": args.dimension, "loss": args.loss, "positions": positions,
+                   "mean_loss": mean_loss, "weight_scale": WEIGHT_SCALE, "weights": scaled},
+                  f, indent=2)
+    for name in FEATURES:
+        print("{:<14} {:>8.3f} disks -> {:>5}".format(name, weights[name], scaled[name]))
+    print("weights written to {}".format(filename))
+
+
+if __name__ == "__main__":
+    main()
@@ -15,7 +15,8 @@ import sys
 import time
 
 # You can use the functions in othello_shared to write your AI 
-from othello_shared import find_lines, get_possible_moves
+from othello_shared import find_lines, get_possible_moves, play_move
+from othello_protocol import read_turn
 
 
 def select_move(board, color):
@@ -29,8 +30,6 @@ def select_move(board, color):
     # select a random one!
     moves = get_possible_moves(board, color) # returns a list of (column, row) tuples.
     i,j = random.choice(moves)
-
-    time.sleep(0.1) # Delay, so Randy doesn't look as simple as he really is.  
     return i,j 
 
 
@@ -45,27 +44,25 @@ def run_ai():
     color = int(input()) # Then we read the color: 1 for dark (goes first), 
                          # 2 for light. 
 
+    board = None
     while True: # This is the main loop 
-        # Read in the current game status, for example:
-        # "SCORE 2 2" or "FINAL 33 31" if the game is over.
-        # The first number is the score for player 1 (dark), the second for player 2 (light)
-        next_input = input() 
-        status, dark_score_s, light_score_s = next_input.strip().split()
-        dark_score = int(dark_score_s)
-        light_score = int(light_score_s)
+        # Read in the current game status and board, or just the opponent's
+        # last move in compact mode (see othello_protocol), for example
+        # "SCORE 2 2" and the board as a list of rows, or "FINAL 33 31" if
+        # the game is over. The scores are for player 1 (dark) and player 2
+        # (light). The squares in each row are represented by
+        # 0 : empty square
+        # 1 : dark disk (player 1)
+        # 2 : light disk (player 2)
+        board, final = read_turn(input, board, color)
 
-        if status == "FINAL": # Game is over. 
-            print 
+        if final is not None: # Game is over. 
+            break
         else: 
-            board = eval(input()) # Read in the input and turn it into a Python
-                                  # object. The format is a list of rows. The 
-                                  # squares in each row are represented by 
-                                  # 0 : empty square
-                                  # 1 : dark disk (player 1)
-                                  # 2 : light disk (player 2)
-                    
             # Select the move and send it to the manager 
             movei, movej = select_move(board, color)
+            time.sleep(0.1) # Delay, so Randy doesn't look as simple as he really is.  
+            board = play_move(board, color, movei, movej)
             print("{} {}".format(movei, movej)) 
 
 
@@ -4,18 +4,74 @@
 """
 COMS W4701 Artificial Intelligence - Programming Homework 2
 
-An AI player for Othello. This is the template file that you need to  
-complete and submit. 
+An AI player for Othello. This is the template file that you need to
+complete and submit.
 
-@author: YOUR NAME AND UNI 
+The minimax functions work on the tuple-of-tuples boards directly. The
+alpha-beta player converts the board to a bitboard (see othello_bitboard),
+plays the move from the opening book for the board size if it has one (see
+othello_book), solves the game exactly once few squares are empty (see
+othello_endgame), and otherwise runs an iterative deepening alpha-beta
+search until the time limit, trying the principal variation of the previous
+iteration first and then the best move remembered for the position in a
+transposition table (see othello_transposition), which is kept for the
+whole game. While the opponent thinks, the AI ponders: it searches the
+position after the reply its principal variation predicts, so that the
+table is already filled if the prediction comes true. Progress is reported
+on stderr.
+
+@author: Yu Liu (yl3957)
 """
 
+import atexit
+import os
 import random
 import sys
+import threading
 import time
+from functools import partial
 
-# You can use the functions in othello_shared to write your AI 
+# You can use the functions in othello_shared to write your AI
 from othello_shared import find_lines, get_possible_moves, get_score, play_move
+from othello_bitboard import (BitBoard, get_move_mask, play_square, popcount,
+                              position_key, squares, to_bitboard)
+from othello_book import OpeningBook, book_filename
+from othello_endgame import EndgameSolver, SolverTimeout
+from othello_eval import get_evaluator, load_weights, weights_filename
+from othello_parallel import HelperPool
+from othello_symmetry import (canonical_key, from_canonical_square, root_symmetries,
+                              to_canonical_square)
+from othello_transposition import EXACT, LOWER, NO_MOVE, UPPER, TranspositionTable
+from othello_game import AiPlayerInterface
+from othello_protocol import read_turn
+
+# Seconds kept in reserve below the game manager's timeout, to cover the
+# unfinished iteration, the clock check interval and the pipe round-trip.
+SAFETY_MARGIN = 1.0
+TIME_LIMIT = AiPlayerInterface.TIMEOUT - SAFETY_MARGIN
+
+# Maximum search depth, or None to deepen until the time runs out.
+DEPTH_LIMIT = None
+
+# Positions with at most this many empty squares are solved exactly (see
+# othello_endgame, whose command line times the solver to tune this).
+ENDGAME_EMPTIES = 12
+
+# Number of helper processes searching alongside the main search (see
+# othello_parallel, whose command line measures the scaling), 0 for none.
+WORKERS = 0
+
+# Whether to search during the opponent's turn.
+PONDER = True
+
+# Whether to play moves from the opening book for the board size, if there is
+# one (see othello_book).
+USE_BOOK = True
+
+# Whether to evaluate with the weights fitted by othello_tune for the board
+# size, if there is a weights file, instead of othello_eval's defaults.
+USE_WEIGHTS = True
+
 
 def compute_utility(board, color):
     """
@@ -23,79 +79,528 @@ def compute_utility(board, color):
     (represented as a tuple of tuples) from the perspective
     of the player "color" (1 for dark, 2 for light)
     """
-    return 0
+    if isinstance(board, BitBoard):
+        dark, light = popcount(board.dark), popcount(board.light)
+    else:
+        dark, light = get_score(board)
+    return dark - light if color == 1 else light - dark
+
+
+# Evaluators by board dimension, created with the first evaluation.
+EVALUATORS = {}
+
+
+def get_board_evaluator(dimension):
+    evaluator = EVALUATORS.get(dimension)
+    if evaluator is None:
+        filename = weights_filename(dimension)
+        weights = load_weights(filename) if USE_WEIGHTS and os.path.exists(filename) else None
+        evaluator = get_evaluator(dimension, weights)
+        EVALUATORS[dimension] = evaluator
+    return evaluator
+
+
+def terminal_weight(dimension):
+    """
+    Final positions are scored as the disk difference times this weight,
+    which is larger than any heuristic evaluation, so that a won game is
+    always preferred over any heuristic evaluation (and a lost one always
+    avoided), whatever the evaluation weights.
+    """
+    return get_board_evaluator(dimension).bound + 1
+
+
+def evaluate(board, color, moves=None):
+    """
+    Heuristic value of a non-final BitBoard for color (see othello_eval);
+    moves is color's move mask, if already known.
+    """
+    return get_board_evaluator(board.dimension).evaluate(board, color, moves)
 
 
 ############ MINIMAX ###############################
 
 def minimax_min_node(board, color):
-    return None
+    opponent = 1 if color == 2 else 2
+    moves = get_possible_moves(board, opponent)
+    if not moves:
+        return compute_utility(board, color)
+    return min(minimax_max_node(play_move(board, opponent, i, j), color) for i, j in moves)
 
 
 def minimax_max_node(board, color):
-    return None 
+    moves = get_possible_moves(board, color)
+    if not moves:
+        return compute_utility(board, color)
+    return max(minimax_min_node(play_move(board, color, i, j), color) for i, j in moves)
+
 
-    
 def select_move_minimax(board, color):
     """
-    Given a board and a player color, decide on a move. 
+    Given a board and a player color, decide on a move.
     The return value is a tuple of integers (i,j), where
-    i is the column and j is the row on the board.  
+    i is the column and j is the row on the board.
     """
-    return 0,0 
+    best_move = None
+    best_value = None
+    for i, j in get_possible_moves(board, color):
+        value = minimax_min_node(play_move(board, color, i, j), color)
+        if best_value is None or value > best_value:
+            best_move = (i, j)
+            best_value = value
+    return best_move
 
 
 ############ ALPHA-BETA PRUNING #####################
 
+class SearchTimeout(Exception):
+    pass
+
+
+class AlphaBetaSearch(object):
+    """
+    Iterative deepening alpha-beta search over BitBoards, in negamax form:
+    every value is from the point of view of the player to move. A position
+    where the player to move has no legal move ends the game, as it does in
+    the game manager. If the root position is symmetric, positions are kept
+    in the transposition table under their canonical key for the root's
+    symmetries (see othello_symmetry), so that mirror images share entries.
+    """
+
+    # Number of nodes searched between two looks at the clock.
+    CHECK_INTERVAL = 1024
+
+    def __init__(self, time_limit=TIME_LIMIT, depth_limit=DEPTH_LIMIT, log=sys.stderr,
+                 table=None, endgame_empties=ENDGAME_EMPTIES):
+        self.time_limit = time_limit
+        self.depth_limit = depth_limit
+        self.log = log
+        self.table = TranspositionTable() if table is None else table
+        self.endgame_empties = endgame_empties
+        self.solver = EndgameSolver()
+        self.first_depth = 1
+        self.use_symmetry = True
+        self.symmetries = []
+        self.deadline = None
+        self.stop = None
+        self.nodes = 0
+        self.value = None
+        self.depth = 0
+        self.pv = []
+        self.pv_table = []
+
+    def check_time(self):
+        if self.stop is not None and self.stop.is_set():
+            raise SearchTimeout
+        if self.deadline is not None and time.time() > self.deadline:
+            raise SearchTimeout
+
+    def search(self, board, player, alpha, beta, depth, ply, on_pv):
+        """
+        Returns the value of board for player (the player to move), searched
+        depth plies deep. on_pv is True while the path from the root follows
+        the previous iteration's principal variation, whose next move is then
+        tried first, followed by the move stored in the transposition table.
+        Stored values at least depth deep end the search of a node right
+        away, except at the root and along the principal variation. The best
+        line found is left in self.pv_table[ply].
+        """
+        self.nodes = self.nodes + 1
+        if self.nodes % AlphaBetaSearch.CHECK_INTERVAL == 0:
+            self.check_time()
+        self.pv_table[ply] = []
+        moves = get_move_mask(board, player)
+        if not moves:
+            return terminal_weight(board.dimension) * compute_utility(board, player)
+        if depth == 0:
+            return evaluate(board, player, moves)
+
+        if self.symmetries:
+            key, symmetry = canonical_key(board, player, self.symmetries)
+        else:
+            key, symmetry = position_key(board, player), 0
+        entry = self.table.probe(key)
+        hash_move = NO_MOVE
+        if entry is not None:
+            value, bound, stored_depth, hash_move = entry
+            if symmetry and hash_move != NO_MOVE:
+                hash_move = from_canonical_square(hash_move, symmetry, board.dimension)
+            if ply > 0 and not on_pv and stored_depth >= depth:
+                if (bound == EXACT or (bound == LOWER and value >= beta)
+                        or (bound == UPPER and value <= alpha)):
+                    return value
+
+        ordered = squares(moves)
+        if hash_move in ordered:
+            ordered.remove(hash_move)
+            ordered.insert(0, hash_move)
+        if on_pv and ply < len(self.pv) and self.pv[ply] in ordered:
+            ordered.remove(self.pv[ply])
+            ordered.insert(0, self.pv[ply])
+        else:
+            on_pv = False
+        original_alpha = alpha
+        opponent = 1 if player == 2 else 2
+        best = None
+        for square in ordered:
+            value = -self.search(play_square(board, player, square), opponent,
+                                 -beta, -alpha, depth - 1, ply + 1, on_pv)
+            on_pv = False
+            if best is None or value > best:
+                best = value
+                self.pv_table[ply] = [square] + self.pv_table[ply + 1]
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                break
+        if best <= original_alpha:
+            bound = UPPER
+        elif best >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        move = self.pv_table[ply][0]
+        if symmetry:
+            move = to_canonical_square(move, symmetry, board.dimension)
+        self.table.store(key, best, bound, depth, move)
+        return best
+
+    def search_root(self, board, color, depth):
+        """
+        Searches board to the given depth and returns its value for color. The
+        principal variation is stored in self.pv.
+        """
+        self.pv_table = [[] for _ in range(depth + 2)]
+        value = self.search(board, color, -float("inf"), float("inf"), depth, 0, True)
+        self.pv = self.pv_table[0]
+        return value
+
+    def select_move(self, board, color, stop=None):
+        """
+        Runs iterative deepening on a BitBoard until the time or depth limit
+        is reached, or the search reaches the end of the game, and returns
+        the best move of the deepest completed iteration as (column, row).
+        Its value and depth are left in self.value and self.depth. If stop
+        (a threading.Event) is given, there is no time limit and the search
+        runs until the event is set.
+        """
+        start = time.time()
+        self.stop = stop
+        if stop is not None or self.time_limit is None:
+            self.deadline = None
+        else:
+            self.deadline = start + self.time_limit
+        self.nodes = 0
+        self.pv = []
+        self.value = None
+        self.depth = 0
+        self.table.new_search()
+        self.table.probes = 0
+        self.table.hits = 0
+        self.symmetries = root_symmetries(board) if self.use_symmetry else []
+        n = board.dimension
+        moves = squares(get_move_mask(board, color))
+        if not moves:
+            return None
+        best = moves[0]
+        empties = n * n - popcount(board.dark | board.light)
+        if self.endgame_empties is not None and empties <= self.endgame_empties:
+            solved = self.solve(board, color, start)
+            if solved is not None:
+                return solved
+        depth = self.first_depth
+        while self.depth_limit is None or depth <= self.depth_limit:
+            try:
+                value = self.search_root(board, color, depth)
+            except SearchTimeout:
+                break
+            best = self.pv[0]
+            self.value = value
+            self.depth = depth
+            elapsed = time.time() - start
+            self.report("depth {}: move {},{} value {}, {} nodes, {:.2f}s, {:.0f} nodes/s, "
+                        "{:.1%} table hits".format(
+                            depth, best % n, best // n, value, self.nodes, elapsed,
+                            self.nodes / max(elapsed, 1e-9), self.table.hit_rate()))
+            if depth >= empties:
+                break
+            depth = depth + 1
+        return best % n, best // n
+
+    def solve(self, board, color, start):
+        """
+        Solves the endgame with the solver, given at most half of the time
+        limit, and returns the move as (column, row), or None if it ran out of
+        time. The move and the reply the solver expects are left in self.pv.
+        """
+        deadline = None if self.deadline is None else start + self.time_limit / 2
+        n = board.dimension
+        empties = n * n - popcount(board.dark | board.light)
+        try:
+            value, square = self.solver.solve(board, color, True, deadline, self.stop)
+        except SolverTimeout:
+            self.report("endgame: {} empties not solved in {:.2f}s".format(
+                empties, time.time() - start))
+            return None
+        self.report("endgame: {} empties, move {},{} value {:+d}, {} nodes, {:.3f}s".format(
+            empties, square % n, square // n, value, self.solver.nodes, time.time() - start))
+        self.pv = [square]
+        self.value = terminal_weight(n) * value
+        self.depth = empties
+        opponent = 1 if color == 2 else 2
+        entry = self.solver.table.probe(position_key(play_square(board, color, square), opponent))
+        if entry is not None and entry[3] != NO_MOVE:
+            self.pv.append(entry[3])
+        return square % n, square // n
+
+    def report(self, message):
+        if self.log is not None:
+            self.log.write(message + "\n")
+            self.log.flush()
+
+
+class ParallelSearch(AlphaBetaSearch):
+    """
+    The alpha-beta search with helper processes (see othello_parallel) that
+    search the same position and share the transposition table. Endgames
+    are solved by the main process alone.
+    """
+
+    def __init__(self, workers, time_limit=TIME_LIMIT, depth_limit=DEPTH_LIMIT,
+                 log=sys.stderr, endgame_empties=ENDGAME_EMPTIES):
+        self.helpers = HelperPool(workers, partial(AlphaBetaSearch, time_limit=None, log=None,
+                                                   endgame_empties=None))
+        AlphaBetaSearch.__init__(self, time_limit, depth_limit, log, self.helpers.table,
+                                 endgame_empties)
+        self.total_nodes = 0
+        atexit.register(self.close)
+
+    def select_move(self, board, color, stop=None):
+        n = board.dimension
+        empties = n * n - popcount(board.dark | board.light)
+        if ((self.endgame_empties is not None and empties <= self.endgame_empties)
+                or not get_move_mask(board, color)):
+            move = AlphaBetaSearch.select_move(self, board, color, stop)
+            self.total_nodes = self.nodes
+            return move
+        start = time.time()
+        self.helpers.start(board, color, self.table.generation % 63 + 1)
+        try:
+            move = AlphaBetaSearch.select_move(self, board, color, stop)
+        finally:
+            helpers = self.helpers.finish()
+        elapsed = time.time() - start
+        self.total_nodes = self.nodes + sum(nodes for nodes, _, _ in helpers)
+        self.report("parallel: {} nodes with {} helpers, {:.0f} nodes/s, helper depths {}".format(
+            self.total_nodes, len(helpers), self.total_nodes / max(elapsed, 1e-9),
+            " ".join(str(depth) for _, depth, _ in helpers)))
+        return move
+
+    def close(self):
+        self.helpers.close()
+
+
+# The search behind alphabeta_min_node and alphabeta_max_node, kept between
+# calls along with its transposition table.
+NODE_SEARCHER = None
+
+
+def get_node_searcher(depth):
+    """
+    Returns the node functions' AlphaBetaSearch, ready for a search depth
+    plies deep.
+    """
+    global NODE_SEARCHER
+    if NODE_SEARCHER is None:
+        NODE_SEARCHER = AlphaBetaSearch(time_limit=None, log=None, table=TranspositionTable(10))
+    NODE_SEARCHER.pv_table = [[] for _ in range(depth + 2)]
+    return NODE_SEARCHER
+
+
 #alphabeta_min_node(board, color, alpha, beta, level, limit)
-def alphabeta_min_node(board, color, alpha, beta): 
-    return None
+def alphabeta_min_node(board, color, alpha, beta, level, limit):
+    """
+    Value for color of a board (a BitBoard or a tuple of rows) where the
+    opponent of color is to move, searched limit - level plies deep.
+    """
+    opponent = 1 if color == 2 else 2
+    searcher = get_node_searcher(limit - level)
+    if not isinstance(board, BitBoard):
+        board = to_bitboard(board)
+    return -searcher.search(board, opponent, -beta, -alpha, limit - level, 0, False)
 
 
 #alphabeta_max_node(board, color, alpha, beta, level, limit)
-def alphabeta_max_node(board, color, alpha, beta):
-    return None
+def alphabeta_max_node(board, color, alpha, beta, level, limit):
+    """
+    Value for color of a board (a BitBoard or a tuple of rows) where color is
+    to move, searched limit - level plies deep.
+    """
+    searcher = get_node_searcher(limit - level)
+    if not isinstance(board, BitBoard):
+        board = to_bitboard(board)
+    return searcher.search(board, color, alpha, beta, limit - level, 0, False)
+
+
+class Ponderer(object):
+    """
+    Runs the engine in a background thread on the position after the
+    opponent's predicted reply while the AI waits for the manager, and keeps
+    count of how often the prediction was right and how much search time
+    went into the positions that were then actually reached.
+    """
 
+    def __init__(self, engine):
+        self.engine = engine
+        self.stop = threading.Event()
+        self.thread = None
+        self.predicted = None
+        self.started = None
+        self.finished = None
+        self.predictions = 0
+        self.hits = 0
+        self.time_saved = 0.0
 
-def select_move_alphabeta(board, color): 
-    return 0,0 
+    def start(self, board, color):
+        """
+        Starts pondering after color played and reached the BitBoard board,
+        if the last search predicted a legal reply that does not end the game.
+        """
+        opponent = 1 if color == 2 else 2
+        pv = self.engine.pv
+        if len(pv) < 2 or not get_move_mask(board, opponent) & (1 << pv[1]):
+            return
+        predicted = play_square(board, opponent, pv[1])
+        if not get_move_mask(predicted, color):
+            return
+        n = board.dimension
+        self.engine.report("pondering on reply {},{}".format(pv[1] % n, pv[1] // n))
+        self.predicted = predicted
+        self.started = time.time()
+        self.finished = None
+        self.stop.clear()
+        self.thread = threading.Thread(target=self.ponder, args=(predicted, color))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def ponder(self, board, color):
+        self.engine.select_move(board, color, self.stop)
+        # The search can end before the manager's reply arrives, on its depth
+        # limit or a solved position; only the time until then was saved.
+        self.finished = time.time()
+
+    def finish(self, board):
+        """
+        Stops pondering once the manager sent the actual position board, and
+        records whether it is the predicted one.
+        """
+        if self.thread is None:
+            return
+        self.stop.set()
+        self.thread.join()
+        self.thread = None
+        self.predictions = self.predictions + 1
+        if not isinstance(board, BitBoard):
+            board = to_bitboard(board)
+        if (board.dark, board.light) == (self.predicted.dark, self.predicted.light):
+            self.hits = self.hits + 1
+            now = time.time()
+            finished = now if self.finished is None else min(self.finished, now)
+            self.time_saved = self.time_saved + finished - self.started
+
+    def summary(self):
+        return "pondering: {} of {} predictions hit ({:.1%}), {:.2f}s searched ahead on hits".format(
+            self.hits, self.predictions, self.hits / max(self.predictions, 1), self.time_saved)
+
+
+# The search engine is kept for the whole game.
+ENGINE = None
+
+# Opening books by board dimension, None where there is no book.
+BOOKS = {}
+
+
+def get_engine():
+    global ENGINE
+    if ENGINE is None:
+        if WORKERS:
+            ENGINE = ParallelSearch(WORKERS, TIME_LIMIT, DEPTH_LIMIT,
+                                    endgame_empties=ENDGAME_EMPTIES)
+        else:
+            ENGINE = AlphaBetaSearch(TIME_LIMIT, DEPTH_LIMIT, endgame_empties=ENDGAME_EMPTIES)
+    return ENGINE
+
+
+def get_book(dimension):
+    if dimension not in BOOKS:
+        filename = book_filename(dimension)
+        BOOKS[dimension] = OpeningBook(filename) if os.path.exists(filename) else None
+    return BOOKS[dimension]
+
+
+def select_move_alphabeta(board, color):
+    """
+    Given a board and a player color, decide on a move from the opening book,
+    or else with iterative deepening alpha-beta search.
+    """
+    if not isinstance(board, BitBoard):
+        board = to_bitboard(board)
+    engine = get_engine()
+    book = get_book(board.dimension) if USE_BOOK else None
+    square = None if book is None else book.lookup(board, color)
+    if square is not None:
+        n = board.dimension
+        engine.report("book move {},{}".format(square % n, square // n))
+        # There is no search to take a principal variation from.
+        engine.pv = []
+        return square % n, square // n
+    return engine.select_move(board, color)
+
+
+# The move selection used by the game manager's in-process players.
+select_move = select_move_alphabeta
 
 
 ####################################################
 def run_ai():
     """
-    This function establishes communication with the game manager. 
-    It first introduces itself and receives its color. 
+    This function establishes communication with the game manager.
+    It first introduces itself and receives its color.
     Then it repeatedly receives the current score and current board state
-    until the game is over. 
-    """
-    print("Minimax AI") # First line is the name of this AI  
-    color = int(input()) # Then we read the color: 1 for dark (goes first), 
-                         # 2 for light. 
-
-    while True: # This is the main loop 
-        # Read in the current game status, for example:
-        # "SCORE 2 2" or "FINAL 33 31" if the game is over.
-        # The first number is the score for player 1 (dark), the second for player 2 (light)
-        next_input = input() 
-        status, dark_score_s, light_score_s = next_input.strip().split()
-        dark_score = int(dark_score_s)
-        light_score = int(light_score_s)
-
-        if status == "FINAL": # Game is over. 
-            print 
-        else: 
-            board = eval(input()) # Read in the input and turn it into a Python
-                                  # object. The format is a list of rows. The 
-                                  # squares in each row are represented by 
-                                  # 0 : empty square
-                                  # 1 : dark disk (player 1)
-                                  # 2 : light disk (player 2)
-                    
-            # Select the move and send it to the manager 
-            movei, movej = select_move_minimax(board, color)
-            #movei, movej = select_move_alphabeta(board, color)
-            print("{} {}".format(movei, movej)) 
+    until the game is over.
+    """
+    print("Alpha-Beta AI") # First line is the name of this AI
+    color = int(input()) # Then we read the color: 1 for dark (goes first),
+                         # 2 for light.
+
+    board = None
+    ponderer = Ponderer(get_engine()) if PONDER else None
+    while True: # This is the main loop
+        # Read in the current game status and board, or just the opponent's
+        # last move in compact mode (see othello_protocol), for example
+        # "SCORE 2 2" and the board as a list of rows, or "FINAL 33 31" if
+        # the game is over. The scores are for player 1 (dark) and player 2
+        # (light). The squares in each row are represented by
+        # 0 : empty square
+        # 1 : dark disk (player 1)
+        # 2 : light disk (player 2)
+        board, final = read_turn(input, board, color)
+        if ponderer is not None:
+            ponderer.finish(board)
+
+        if final is not None: # Game is over.
+            if ponderer is not None:
+                get_engine().report(ponderer.summary())
+            break
+        else:
+            # Select the move and send it to the manager
+            #movei, movej = select_move_minimax(board, color)
+            movei, movej = select_move_alphabeta(board, color)
+            board = play_move(board, color, movei, movej)
+            print("{} {}".format(movei, movej))
+            sys.stdout.flush()
+            if ponderer is not None:
+                ponderer.start(to_bitboard(board), color)
 
 
 if __name__ == "__main__":